@@ -1,81 +1,791 @@
-from http.server import BaseHTTPRequestHandler
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import base64
+import gzip
+import hashlib
 import json
 import os
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
 from urllib.parse import urlparse, parse_qs
 from datetime import datetime
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 与爬取脚本共享的统计模块
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from news_aggregates import build_news_aggregates, parse_timestamp, positions_between, sorted_counts, time_range_bounds
+from news_search import build_search_index, search_index
+
+# 数据目录的候选根路径（依次对应 当前目录 / 上级目录 / 根目录）
+DATA_ROOT_CANDIDATES = ['', '..', '/']
+
+# 已解析的数据根路径，进程内只探测一次
+_data_root = None
+
+# 已解析的JSON文档缓存: 绝对路径 -> ((mtime_ns, size), 文档)
+_document_cache = {}
+_document_cache_lock = threading.Lock()
+_document_cache_stats = {'hits': 0, 'misses': 0}
+
+# 由数据文件派生的结构（如检索索引）: 名称 -> (数据版本, 派生结果)
+_derived_cache = {}
+_derived_cache_lock = threading.Lock()
+
+# 已编码的响应缓存: (处理方法, 标准化查询, 数据版本) -> {编码方式: 响应字节}
+RESPONSE_CACHE_SIZE = 128
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+# 小于该字节数的响应不压缩
+COMPRESSION_MIN_SIZE = 1024
+
+# 服务端支持的压缩方式（按优先级排列）
+SUPPORTED_ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+# 新闻列表分页参数
+DEFAULT_PAGE_LIMIT = 20
+MAX_PAGE_LIMIT = 100
+
+# 新闻集合: 名称 -> 新闻文件及爬取脚本生成的聚合统计、检索索引文件
+NEWS_COLLECTIONS = {
+    'news': {
+        'news_file': 'data/news.json',
+        'aggregates_file': 'data/news_aggregates.json',
+        'index_file': 'data/news_search_index.json'
+    },
+    'tencent': {
+        'news_file': 'data/tencent_news.json',
+        'aggregates_file': 'data/tencent_news_aggregates.json',
+        'index_file': 'data/tencent_news_search_index.json'
+    }
+}
+
+# 时间分布统计支持的粒度: 名称 -> (秒数, 输出格式)
+HISTOGRAM_BUCKETS = {
+    'hour': (3600, '%Y-%m-%dT%H:00'),
+    'day': (86400, '%Y-%m-%d')
+}
+
+# 路由表: 路径 -> 处理方法、是否接收查询参数、依赖的数据文件
+# daily=True 表示响应内容与当天日期相关（如今日新闻数）
+ROUTES = {
+    '/api/news/latest': {'handler': 'get_latest_news', 'query': True, 'files': ('data/news.json', 'data/news_aggregates.json')},
+    '/api/news': {'handler': 'get_latest_news', 'query': True, 'files': ('data/news.json', 'data/news_aggregates.json')},
+    '/api/news/histogram': {'handler': 'get_news_histogram', 'query': True, 'files': ('data/news.json', 'data/news_aggregates.json', 'data/tencent_news.json', 'data/tencent_news_aggregates.json')},
+    '/api/news/categories': {'handler': 'get_categories', 'query': False, 'files': ('data/news.json', 'data/news_aggregates.json')},
+    '/api/search': {'handler': 'search_news', 'query': True, 'files': ('data/news.json', 'data/news_search_index.json', 'data/tencent_news.json', 'data/tencent_news_search_index.json')},
+    '/api/temperature/latest': {'handler': 'get_latest_temperature', 'query': False, 'files': ('data/analysis.json',)},
+    '/api/temperature': {'handler': 'get_latest_temperature', 'query': False, 'files': ('data/analysis.json',)},
+    '/api/stats/overview': {'handler': 'get_stats_overview', 'query': False, 'files': ('data/news.json', 'data/analysis.json', 'data/news_aggregates.json'), 'daily': True},
+    '/api/stats': {'handler': 'get_stats_overview', 'query': False, 'files': ('data/news.json', 'data/analysis.json', 'data/news_aggregates.json'), 'daily': True},
+    '/api/tencent/news': {'handler': 'get_tencent_news', 'query': True, 'files': ('data/tencent_news.json', 'data/tencent_news_aggregates.json')},
+    '/api/tencent/stats': {'handler': 'get_tencent_stats', 'query': False, 'files': ('data/tencent_news.json', 'data/tencent_analysis.json', 'data/tencent_news_aggregates.json'), 'daily': True},
+    '/api/tencent/analysis': {'handler': 'get_tencent_analysis', 'query': False, 'files': ('data/tencent_analysis.json',)},
+    '/api/etf/data': {'handler': 'get_etf_data', 'query': False, 'files': ('data/etf_data.json',)},
+    '/api/etf/strategy': {'handler': 'get_etf_strategy', 'query': False, 'files': ('data/etf_strategy.json',)},
+}
+
+# 批量接口可获取的资源: 资源名 -> 路由路径
+BATCH_RESOURCES = {
+    'news.latest': '/api/news/latest',
+    'news.categories': '/api/news/categories',
+    'news.histogram': '/api/news/histogram',
+    'temperature.latest': '/api/temperature/latest',
+    'stats.overview': '/api/stats/overview',
+    'tencent.news': '/api/tencent/news',
+    'tencent.stats': '/api/tencent/stats',
+    'tencent.analysis': '/api/tencent/analysis',
+    'etf.data': '/api/etf/data',
+    'etf.strategy': '/api/etf/strategy'
+}
+
+# 数据更新推送（SSE）配置
+STREAM_POLL_INTERVAL = 0.5
+STREAM_PING_INTERVAL = 15
+STREAM_DEFAULT_DURATION = 300
+STREAM_MAX_DURATION = 3600
+STREAM_MAX_CLIENTS = 8
+STREAM_HISTORY_SIZE = 100
+STREAM_RETRY_MS = 3000
+
+# 新闻文件中新增条目的ID会随更新事件一起推送
+STREAM_DELTA_RESOURCES = {'news.latest': 'data/news.json', 'tencent.news': 'data/tencent_news.json'}
+
+ENDPOINTS = [
+    '/api/news/latest',
+    '/api/news/categories',
+    '/api/news/histogram',
+    '/api/search',
+    '/api/temperature/latest',
+    '/api/stats/overview',
+    '/api/tencent/news',
+    '/api/tencent/stats',
+    '/api/tencent/analysis',
+    '/api/etf/data',
+    '/api/etf/strategy',
+    '/api/batch',
+    '/api/stream'
+]
+
+
+def resolve_data_path(filepath):
+    """解析数据文件的实际路径（数据根目录只探测一次）"""
+    global _data_root
+    
+    if _data_root is None:
+        for root in DATA_ROOT_CANDIDATES:
+            candidate = os.path.join(root, filepath)
+            if os.path.exists(candidate):
+                _data_root = root
+                break
+        else:
+            # 尚未找到数据文件，下次请求时重新探测
+            return None
+    
+    return os.path.join(_data_root, filepath)
+
+
+def file_generation(filepath):
+    """获取数据文件的版本标识 (mtime_ns, size)，文件不存在时返回None"""
+    path = resolve_data_path(filepath)
+    if path is None:
+        return None
+    
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_cached_json(filepath):
+    """
+    读取JSON文件，按 (路径, mtime_ns, size) 缓存解析结果
+    
+    文件未变化时直接返回缓存的文档（调用方不得修改返回的对象）。
+    """
+    path = resolve_data_path(filepath)
+    if path is None:
+        return None
+    
+    key = file_generation(filepath)
+    if key is None:
+        return None
+    
+    with _document_cache_lock:
+        cached = _document_cache.get(path)
+        if cached is not None and cached[0] == key:
+            _document_cache_stats['hits'] += 1
+            return cached[1]
+        _document_cache_stats['misses'] += 1
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    
+    with _document_cache_lock:
+        _document_cache[path] = (key, document)
+    
+    return document
+
+
+def get_derived(name, generation, builder):
+    """获取由数据文件派生的结构，数据版本变化时重新构建"""
+    with _derived_cache_lock:
+        cached = _derived_cache.get(name)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+    
+    value = builder()
+    with _derived_cache_lock:
+        _derived_cache[name] = (generation, value)
+    return value
+
+
+def get_cache_stats():
+    """获取文档缓存的命中统计"""
+    with _document_cache_lock:
+        stats = {
+            'hits': _document_cache_stats['hits'],
+            'misses': _document_cache_stats['misses'],
+            'documents': len(_document_cache)
+        }
+    with _response_cache_lock:
+        stats['responses'] = len(_response_cache)
+    return stats
+
+
+def normalize_query(query):
+    """将查询参数标准化为可哈希的有序元组"""
+    return tuple(sorted((key, tuple(values)) for key, values in query.items()))
+
+
+def route_generation(route):
+    """计算路由依赖的所有数据文件的版本"""
+    generation = tuple(file_generation(filepath) for filepath in route['files'])
+    if route.get('daily'):
+        generation += (datetime.now().date().isoformat(),)
+    return generation
+
+
+def route_cache_key(route, query):
+    """路由响应的缓存键: (处理方法, 标准化查询, 数据版本)"""
+    query_key = normalize_query(query) if route['query'] else ()
+    return (route['handler'], query_key, route_generation(route))
+
+
+def make_etag(cache_key, encoding='identity'):
+    """根据缓存键生成强ETag（不同压缩方式的表示使用不同的ETag）"""
+    digest = hashlib.sha1(repr(cache_key).encode('utf-8')).hexdigest()[:20]
+    if encoding != 'identity':
+        return f'"{digest}-{encoding}"'
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """判断 If-None-Match 请求头是否命中当前ETag（忽略压缩方式后缀）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    
+    def base_tag(tag):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        for encoding in ('br', 'gzip'):
+            if tag.endswith(f'-{encoding}'):
+                return tag[:-len(encoding) - 1]
+        return tag
+    
+    current = base_tag(etag)
+    return any(base_tag(tag) == current for tag in if_none_match.split(','))
+
+
+def negotiate_encoding(accept_encoding):
+    """根据 Accept-Encoding 请求头选择压缩方式"""
+    if not accept_encoding:
+        return 'identity'
+    
+    weights = {}
+    for part in accept_encoding.split(','):
+        fields = part.strip().split(';')
+        name = fields[0].strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in fields[1:]:
+            param = param.strip()
+            if param.startswith('q='):
+                try:
+                    weight = float(param[2:])
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    
+    best, best_weight = 'identity', 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def encode_body(body, encoding):
+    """按指定方式压缩响应，过小的响应保持原样；返回 (响应字节, 实际编码)"""
+    if encoding == 'identity' or len(body) < COMPRESSION_MIN_SIZE:
+        return body, 'identity'
+    if encoding == 'br':
+        return brotli.compress(body, quality=5), 'br'
+    return gzip.compress(body, compresslevel=6, mtime=0), 'gzip'
+
+
+def get_cached_response(cache_key, encoding):
+    """读取已编码的响应，按需生成并缓存压缩版本；未缓存时返回None"""
+    with _response_cache_lock:
+        variants = _response_cache.get(cache_key)
+        if variants is None:
+            return None
+        _response_cache.move_to_end(cache_key)
+        if encoding in variants:
+            return variants[encoding], encoding
+        body = variants['identity']
+    
+    encoded, encoding = encode_body(body, encoding)
+    with _response_cache_lock:
+        variants[encoding] = encoded
+    return encoded, encoding
+
+
+def put_cached_response(cache_key, body):
+    """缓存已编码的响应（LRU淘汰）"""
+    with _response_cache_lock:
+        _response_cache[cache_key] = {'identity': body}
+        _response_cache.move_to_end(cache_key)
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+def parse_int_param(query, name, default, minimum=0, maximum=None):
+    """解析整数查询参数，超出上限时截断"""
+    raw = query.get(name, [''])[0]
+    if raw == '':
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f'Invalid {name}: {raw}')
+    if value < minimum:
+        raise ValueError(f'Invalid {name}: {raw}')
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+
+def news_key(news):
+    """新闻的稳定标识（URL摘要），用于分页游标"""
+    return hashlib.sha1(news.get('url', '').encode('utf-8')).hexdigest()[:12]
+
+
+def parse_time_param(query, name):
+    """解析ISO格式的时间参数为epoch秒；只给出日期的 until 包含当天全天"""
+    raw = query.get(name, [''])[0]
+    if raw == '':
+        return None
+    timestamp = parse_timestamp(raw)
+    if timestamp is None:
+        raise ValueError(f'Invalid {name}: {raw}')
+    if name == 'until' and len(raw) == 10:
+        timestamp += 86400 - 1e-6
+    return timestamp
+
+
+def project_fields(news_list, query):
+    """按 fields 参数（逗号分隔）投影新闻字段"""
+    fields = [f.strip() for f in query.get('fields', [''])[0].split(',') if f.strip()]
+    if not fields:
+        return news_list
+    return [{key: news[key] for key in fields if key in news} for news in news_list]
+
+
+def encode_cursor(item, offset):
+    """生成分页游标（记录本页最后一条新闻的标识及位置）"""
+    payload = json.dumps({'key': news_key(item), 'offset': offset})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, news_list):
+    """将分页游标解析为起始位置；游标对应的新闻已不存在时退回记录的位置"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        key = payload['key']
+        offset = int(payload['offset'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    
+    for index, news in enumerate(news_list):
+        if news_key(news) == key:
+            return index + 1
+    return max(offset, 0)
+
+
+def select_news(news_list, query, default_limit=DEFAULT_PAGE_LIMIT):
+    """
+    按查询参数筛选、分页并投影新闻列表
+    
+    支持参数: category, cursor/offset, limit（不超过 MAX_PAGE_LIMIT）,
+    fields（逗号分隔的字段列表）。
+    
+    Returns:
+        (本页新闻, 筛选后总数, 下一页游标)
+    """
+    category = query.get('category', [''])[0]
+    if category:
+        news_list = [n for n in news_list if n.get('category') == category]
+    
+    limit = parse_int_param(query, 'limit', default_limit, minimum=1, maximum=MAX_PAGE_LIMIT)
+    cursor = query.get('cursor', [''])[0]
+    if cursor:
+        start = decode_cursor(cursor, news_list)
+    else:
+        start = parse_int_param(query, 'offset', 0)
+    
+    page = news_list[start:start + limit]
+    next_cursor = None
+    if page and start + limit < len(news_list):
+        next_cursor = encode_cursor(page[-1], start + len(page))
+    
+    return project_fields(page, query), len(news_list), next_cursor
+
+
+class DataWatcher:
+    """
+    轮询数据文件版本，变化时唤醒等待中的推送连接
+    
+    每次变化分配递增的版本号，并保留最近的变化记录，供断线重连的客户端补发。
+    stop() 唤醒所有等待中的推送连接并让它们结束，服务器关闭时调用。
+    """
+    
+    def __init__(self, files, interval=STREAM_POLL_INTERVAL):
+        self.files = sorted(files)
+        self.interval = interval
+        self.version = 0
+        self.changes = []
+        self.condition = threading.Condition()
+        self.generations = {}
+        self.news_ids = {}
+        self.thread = None
+        self.stopped = threading.Event()
+    
+    def start(self):
+        """启动后台轮询线程（重复调用无副作用）"""
+        with self.condition:
+            if self.thread is not None:
+                return
+            for filepath in self.files:
+                self.generations[filepath] = file_generation(filepath)
+                self.news_ids[filepath] = self.load_news_ids(filepath)
+            self.thread = threading.Thread(target=self.run, name='data-watcher', daemon=True)
+            self.thread.start()
+    
+    def load_news_ids(self, filepath):
+        """
+        读取新闻文件中的条目 {链接: ID}（非新闻文件返回None）
+        
+        按链接比较前后两次的条目：旧数据文件中的ID来自进程内随机化的 hash()，每次抓取都会变化
+        """
+        if filepath not in STREAM_DELTA_RESOURCES.values():
+            return None
+        try:
+            document = load_cached_json(filepath)
+        except Exception:
+            return None
+        return {news.get('url') or news.get('id'): news.get('id') for news in (document or {}).get('news', [])}
+    
+    def stop(self):
+        """停止轮询，唤醒并结束所有等待中的推送连接"""
+        with self.condition:
+            self.stopped.set()
+            self.condition.notify_all()
+    
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            for filepath in self.files:
+                generation = file_generation(filepath)
+                if generation == self.generations.get(filepath):
+                    continue
+                self.generations[filepath] = generation
+                
+                previous_ids = self.news_ids.get(filepath)
+                current_ids = self.load_news_ids(filepath)
+                self.news_ids[filepath] = current_ids
+                added_ids = None
+                if previous_ids is not None and current_ids is not None:
+                    added_ids = sorted((current_ids[key] for key in current_ids.keys() - previous_ids.keys()), key=str)
+                
+                with self.condition:
+                    self.version += 1
+                    self.changes.append((self.version, filepath, added_ids))
+                    del self.changes[:-STREAM_HISTORY_SIZE]
+                    self.condition.notify_all()
+    
+    def changes_since(self, version):
+        """返回版本号大于 version 的变化记录"""
+        with self.condition:
+            return [change for change in self.changes if change[0] > version]
+    
+    def wait(self, version, timeout):
+        """等待新的变化，超时或已停止时返回空列表"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version > version or self.stopped.is_set(), timeout=timeout)
+            return [change for change in self.changes if change[0] > version]
+
+
+_data_watcher = DataWatcher({f for path in BATCH_RESOURCES.values() for f in ROUTES[path]['files']})
+_stream_slots = threading.BoundedSemaphore(STREAM_MAX_CLIENTS)
+
+
 class handler(BaseHTTPRequestHandler):
     
     def do_GET(self):
         """处理GET请求"""
         parsed_path = urlparse(self.path)
-        path = parsed_path.path
+        # 标准化路径（移除尾部斜杠）
+        path = parsed_path.path.rstrip('/')
         query = parse_qs(parsed_path.query)
         
         # 打印调试信息
         print(f"Received request: {path}")
         
-        # 设置CORS头
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        route = ROUTES.get(path)
+        encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+        
+        if path == '/api/batch':
+            self.handle_batch(query, encoding)
+            return
+        
+        if path == '/api/stream':
+            self.handle_stream(query)
+            return
+        
+        if route is None:
+            if path == '/api/health' or path == '/api':
+                response = {'success': True, 'message': 'API is running', 'cache': get_cache_stats(), 'endpoints': ENDPOINTS}
+            else:
+                response = {'success': False, 'error': f'Endpoint not found: {path}', 'available_endpoints': ENDPOINTS}
+            self.send_json_response(response, encoding)
+            return
+        
+        cache_key = route_cache_key(route, query)
+        
+        # 客户端缓存仍然有效，只返回响应头
+        if self.send_not_modified(cache_key, encoding):
+            return
+        
+        cached = get_cached_response(cache_key, encoding)
+        if cached is None:
+            body, cacheable = self.render_route(route, query, cache_key)
+            if not cacheable:
+                self.send_json_body(*encode_body(body, encoding))
+                return
+            cached = get_cached_response(cache_key, encoding)
+        
+        body, encoding = cached
+        self.send_json_body(body, encoding, make_etag(cache_key, encoding))
+    
+    def handle_batch(self, query, encoding):
+        """
+        批量获取多个资源（/api/batch?r=etf.strategy,etf.data）
+        
+        各资源独立缓存，合并响应直接拼接已编码的字节；资源专属的查询参数
+        以资源名为前缀传入，如 news.latest.limit=10。
+        """
+        names = [name.strip() for name in query.get('r', [''])[0].split(',') if name.strip()]
+        unknown = [name for name in names if name not in BATCH_RESOURCES]
+        if not names or unknown:
+            error = f'Unknown resources: {", ".join(unknown)}' if unknown else 'Missing query parameter: r'
+            self.send_json_response({'success': False, 'error': error, 'available_resources': list(BATCH_RESOURCES)}, encoding)
+            return
+        
+        # 去重并保持请求顺序
+        names = list(OrderedDict.fromkeys(names))
+        resources = []
+        for name in names:
+            route = ROUTES[BATCH_RESOURCES[name]]
+            prefix = f'{name}.'
+            resource_query = {key[len(prefix):]: values for key, values in query.items() if key.startswith(prefix)}
+            resources.append((name, route, resource_query, route_cache_key(route, resource_query)))
+        
+        cache_key = ('batch', tuple(resource[3] for resource in resources))
+        if self.send_not_modified(cache_key, encoding):
+            return
+        
+        cached = get_cached_response(cache_key, encoding)
+        if cached is None:
+            parts = []
+            all_cacheable = True
+            for name, route, resource_query, resource_key in resources:
+                variant = get_cached_response(resource_key, 'identity')
+                if variant is not None:
+                    body = variant[0]
+                else:
+                    body, cacheable = self.render_route(route, resource_query, resource_key)
+                    all_cacheable = all_cacheable and cacheable
+                parts.append(json.dumps(name, ensure_ascii=False).encode('utf-8') + b': ' + body)
+            
+            body = b'{"success": true, "data": {' + b', '.join(parts) + b'}}'
+            if not all_cacheable:
+                self.send_json_body(*encode_body(body, encoding))
+                return
+            put_cached_response(cache_key, body)
+            cached = get_cached_response(cache_key, encoding)
+        
+        body, encoding = cached
+        self.send_json_body(body, encoding, make_etag(cache_key, encoding))
+    
+    def handle_stream(self, query):
+        """
+        以SSE推送数据文件更新（/api/stream?r=news.latest,stats.overview&delta=1）
+        
+        连接建立时为每个资源发送 snapshot 事件，之后数据文件变化时发送 update 事件:
+        {resource, updated_at, etag}，delta=1 时新闻资源附带新增条目的ID。
+        连接在 timeout 秒后关闭，由 EventSource 自动重连（携带 Last-Event-ID 补发）。
+        """
+        names = [name.strip() for name in query.get('r', [''])[0].split(',') if name.strip()] or list(BATCH_RESOURCES)
+        unknown = [name for name in names if name not in BATCH_RESOURCES]
+        if unknown:
+            self.send_json_response({'success': False, 'error': f'Unknown resources: {", ".join(unknown)}'}, 'identity')
+            return
         
         try:
-            # 标准化路径（移除尾部斜杠）
-            path = path.rstrip('/')
-            
-            if path == '/api/news/latest' or path == '/api/news':
-                response = self.get_latest_news(query)
-            elif path == '/api/news/categories':
-                response = self.get_categories()
-            elif path == '/api/temperature/latest' or path == '/api/temperature':
-                response = self.get_latest_temperature()
-            elif path == '/api/stats/overview' or path == '/api/stats':
-                response = self.get_stats_overview()
-            elif path == '/api/tencent/news':
-                response = self.get_tencent_news(query)
-            elif path == '/api/tencent/analysis':
-                response = self.get_tencent_analysis()
-            elif path == '/api/etf/data':
-                response = self.get_etf_data()
-            elif path == '/api/etf/strategy':
-                response = self.get_etf_strategy()
-            elif path == '/api/health' or path == '/api':
-                response = {'success': True, 'message': 'API is running', 'endpoints': [
-                    '/api/news/latest',
-                    '/api/news/categories',
-                    '/api/temperature/latest',
-                    '/api/stats/overview',
-                    '/api/tencent/news',
-                    '/api/tencent/analysis',
-                    '/api/etf/data',
-                    '/api/etf/strategy'
-                ]}
+            duration = parse_int_param(query, 'timeout', STREAM_DEFAULT_DURATION, minimum=1, maximum=STREAM_MAX_DURATION)
+        except ValueError as e:
+            self.send_json_response({'success': False, 'error': str(e)}, 'identity')
+            return
+        with_delta = query.get('delta', [''])[0] in ('1', 'true')
+        
+        if not _stream_slots.acquire(blocking=False):
+            self.send_response(503)
+            self.send_header('Retry-After', str(STREAM_RETRY_MS // 1000))
+            self.send_header('Content-Length', '0')
+            self.send_cors_headers()
+            self.end_headers()
+            return
+        
+        try:
+            _data_watcher.start()
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.send_cors_headers()
+            self.end_headers()
+            self.wfile.write(f'retry: {STREAM_RETRY_MS}\n\n'.encode('utf-8'))
+            
+            # 断线重连时补发错过的变化，否则发送当前状态
+            last_event_id = self.headers.get('Last-Event-ID', '')
+            version = _data_watcher.version
+            missed = []
+            if last_event_id.isdigit() and int(last_event_id) <= version:
+                missed = _data_watcher.changes_since(int(last_event_id))
+            if missed:
+                self.send_stream_changes(missed, names, with_delta)
             else:
-                response = {'success': False, 'error': f'Endpoint not found: {path}', 'available_endpoints': [
-                    '/api/news/latest',
-                    '/api/news/categories',
-                    '/api/temperature/latest',
-                    '/api/stats/overview',
-                    '/api/tencent/news',
-                    '/api/tencent/analysis',
-                    '/api/etf/data',
-                    '/api/etf/strategy'
-                ]}
-        except Exception as e:
-            response = {'success': False, 'error': str(e)}
+                for name in names:
+                    self.send_stream_event('snapshot', self.stream_payload(name), version)
+            self.wfile.flush()
+            
+            deadline = time.monotonic() + duration
+            while not _data_watcher.stopped.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                changes = _data_watcher.wait(version, min(STREAM_PING_INTERVAL, remaining))
+                if _data_watcher.stopped.is_set():
+                    break
+                if changes:
+                    version = changes[-1][0]
+                    self.send_stream_changes(changes, names, with_delta)
+                else:
+                    # 注释行保持连接活跃，并及时发现已断开的客户端
+                    self.wfile.write(b': ping\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            _stream_slots.release()
+    
+    def send_stream_changes(self, changes, names, with_delta):
+        """将文件变化转换为受影响资源的 update 事件"""
+        for version, filepath, added_ids in changes:
+            for name in names:
+                if filepath not in ROUTES[BATCH_RESOURCES[name]]['files']:
+                    continue
+                payload = self.stream_payload(name)
+                if with_delta and added_ids is not None and STREAM_DELTA_RESOURCES.get(name) == filepath:
+                    payload['added_ids'] = added_ids
+                self.send_stream_event('update', payload, version)
+    
+    def stream_payload(self, name):
+        """资源的当前状态: 更新时间与默认查询下的ETag（与直接GET该资源得到的ETag一致）"""
+        route = ROUTES[BATCH_RESOURCES[name]]
+        document = self.load_json_file(route['files'][0]) or {}
+        return {
+            'resource': name,
+            'updated_at': document.get('updated_at') or document.get('analyzed_at'),
+            'etag': make_etag(route_cache_key(route, {}))
+        }
+    
+    def send_stream_event(self, event, payload, version):
+        """写出一条SSE事件"""
+        data = json.dumps(payload, ensure_ascii=False)
+        self.wfile.write(f'id: {version}\nevent: {event}\ndata: {data}\n\n'.encode('utf-8'))
+    
+    def render_route(self, route, query, cache_key):
+        """
+        生成路由的响应字节并写入缓存
+        
+        Returns:
+            (响应字节, 是否已缓存)
+        """
+        response = self.dispatch(route, query)
+        body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        
+        # 只缓存成功的响应，且数据文件在处理期间未被改写
+        if not response.get('success') or route_generation(route) != cache_key[2]:
+            return body, False
+        
+        put_cached_response(cache_key, body)
+        return body, True
+    
+    def send_not_modified(self, cache_key, encoding):
+        """If-None-Match 命中时发送304，返回是否已发送"""
+        if not etag_matches(self.headers.get('If-None-Match'), make_etag(cache_key)):
+            return False
         
-        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        self.send_response(304)
+        self.send_header('ETag', make_etag(cache_key, encoding))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_cors_headers()
+        self.end_headers()
+        return True
+    
+    def send_json_response(self, response, encoding):
+        """编码并发送不缓存的JSON响应"""
+        body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        self.send_json_body(*encode_body(body, encoding))
+    
+    def dispatch(self, route, query):
+        """调用路由对应的处理方法"""
+        try:
+            method = getattr(self, route['handler'])
+            if route['query']:
+                return method(query)
+            return method()
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def send_cors_headers(self):
+        """设置CORS头"""
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, If-None-Match')
+        self.send_header('Access-Control-Expose-Headers', 'ETag')
+    
+    def send_json_body(self, body, encoding='identity', etag=None):
+        """发送JSON响应"""
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_cors_headers()
+        self.end_headers()
+        self.wfile.write(body)
     
     def do_OPTIONS(self):
         """处理OPTIONS请求（CORS预检）"""
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
+        self.send_cors_headers()
         self.end_headers()
     
     def get_latest_news(self, query):
@@ -87,21 +797,16 @@ class handler(BaseHTTPRequestHandler):
             if not news_data:
                 return {'success': False, 'error': 'No news data available'}
             
-            news_list = news_data.get('news', [])
-            
-            # 分类筛选
-            category = query.get('category', [''])[0]
-            if category:
-                news_list = [n for n in news_list if n.get('category') == category]
-            
-            # 限制数量
-            limit = int(query.get('limit', ['20'])[0])
-            news_list = news_list[:limit]
+            # 时间范围、分类筛选、分页与字段投影
+            news_list = self.filter_time_range(news_data.get('news', []), query, 'news')
+            news_list, total, next_cursor = select_news(news_list, query)
             
             return {
                 'success': True,
                 'data': news_list,
                 'count': len(news_list),
+                'total': total,
+                'next_cursor': next_cursor,
                 'updated_at': news_data.get('updated_at')
             }
         except Exception as e:
@@ -110,28 +815,90 @@ class handler(BaseHTTPRequestHandler):
     def get_categories(self):
         """获取新闻分类统计"""
         try:
-            news_data = self.load_json_file('data/news.json')
+            aggregates = self.load_aggregates('data/news.json', 'data/news_aggregates.json')
             
-            if not news_data:
+            if not aggregates:
                 return {'success': False, 'error': 'No news data available'}
             
-            news_list = news_data.get('news', [])
+            return {'success': True, 'data': sorted_counts(aggregates['categories'], 'category')}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def search_news(self, query):
+        """全文检索新闻（标题与摘要，BM25排序）"""
+        try:
+            keywords = query.get('q', [''])[0].strip()
+            if not keywords:
+                return {'success': False, 'error': 'Missing query parameter: q'}
             
-            # 统计分类
-            category_count = {}
-            for news in news_list:
-                category = news.get('category', '其他')
-                category_count[category] = category_count.get(category, 0) + 1
+            collection = query.get('collection', ['all'])[0]
+            if collection == 'all':
+                collections = list(NEWS_COLLECTIONS)
+            elif collection in NEWS_COLLECTIONS:
+                collections = [collection]
+            else:
+                return {'success': False, 'error': f'Unknown collection: {collection}'}
             
-            categories = [
-                {'category': cat, 'count': count}
-                for cat, count in sorted(category_count.items(), key=lambda x: x[1], reverse=True)
-            ]
+            limit = parse_int_param(query, 'limit', DEFAULT_PAGE_LIMIT, minimum=1, maximum=MAX_PAGE_LIMIT)
+            filters = {
+                'category': query.get('category', [''])[0],
+                'source': query.get('source', [''])[0],
+                'since': parse_time_param(query, 'since'),
+                'until': parse_time_param(query, 'until')
+            }
             
-            return {'success': True, 'data': categories}
+            results = []
+            for name in collections:
+                news_data, index = self.load_search_index(name)
+                if not index:
+                    continue
+                
+                news_list = news_data.get('news', [])
+                for hit in search_index(index, keywords, limit=limit, **filters):
+                    news = dict(news_list[hit['position']])
+                    news['collection'] = name
+                    news['score'] = hit['score']
+                    results.append(news)
+            
+            # 各集合的结果按得分合并
+            results.sort(key=lambda x: x['score'], reverse=True)
+            results = project_fields(results[:limit], query)
+            
+            return {
+                'success': True,
+                'query': keywords,
+                'data': results,
+                'count': len(results)
+            }
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def load_search_index(self, collection):
+        """
+        加载爬取脚本生成的检索索引
+        
+        索引缺失或与新闻文件的 updated_at 不一致时，在内存中重建（按文件版本缓存）。
+        
+        Returns:
+            (新闻文档, 索引)
+        """
+        news_file = NEWS_COLLECTIONS[collection]['news_file']
+        index_file = NEWS_COLLECTIONS[collection]['index_file']
+        news_data = self.load_json_file(news_file)
+        if not news_data:
+            return None, None
+        
+        index = self.load_json_file(index_file)
+        if index and index.get('source_updated_at') == news_data.get('updated_at'):
+            return news_data, index
+        
+        index = get_derived(
+            ('search_index', collection),
+            file_generation(news_file),
+            lambda: build_search_index(news_data.get('news', []), news_data.get('updated_at'))
+        )
+        return news_data, index
+    
     def get_latest_temperature(self):
         """获取最新投资温度分析"""
         try:
@@ -147,44 +914,119 @@ class handler(BaseHTTPRequestHandler):
     def get_stats_overview(self):
         """获取统计概览"""
         try:
-            news_data = self.load_json_file('data/news.json')
-            analysis_data = self.load_json_file('data/analysis.json')
+            aggregates = self.load_aggregates('data/news.json', 'data/news_aggregates.json', 'data/analysis.json')
             
-            if not news_data:
+            if not aggregates:
                 return {'success': False, 'error': 'No data available'}
             
-            news_list = news_data.get('news', [])
-            
-            # 统计今日新闻
-            today = datetime.now().date()
-            news_today = sum(
-                1 for news in news_list
-                if datetime.fromisoformat(news.get('published_at', '')).date() == today
+            return {'success': True, 'data': self.build_overview(aggregates)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def get_tencent_stats(self):
+        """获取腾讯新闻统计概览"""
+        try:
+            aggregates = self.load_aggregates(
+                'data/tencent_news.json', 'data/tencent_news_aggregates.json', 'data/tencent_analysis.json'
             )
             
-            # 分类统计
-            category_count = {}
-            for news in news_list:
-                category = news.get('category', '其他')
-                category_count[category] = category_count.get(category, 0) + 1
+            if not aggregates:
+                return {'success': False, 'error': 'No Tencent news data available'}
             
-            category_stats = [
-                {'category': cat, 'count': count}
-                for cat, count in sorted(category_count.items(), key=lambda x: x[1], reverse=True)[:5]
-            ]
+            return {'success': True, 'data': self.build_overview(aggregates)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def build_overview(self, aggregates):
+        """根据聚合统计生成概览数据"""
+        today = datetime.now().date().isoformat()
+        
+        return {
+            'news_total': aggregates['news_total'],
+            'news_today': aggregates['days'].get(today, 0),
+            'category_stats': sorted_counts(aggregates['categories'], 'category', limit=5),
+            'source_stats': sorted_counts(aggregates['sources'], 'source', limit=5),
+            'latest_temperature': {
+                'temperature_score': aggregates['temperature']['temperature_score'],
+                'sentiment': aggregates['temperature']['sentiment']
+            } if aggregates.get('temperature') else None,
+            'updated_at': aggregates['source_updated_at']
+        }
+    
+    def load_aggregates(self, news_file, aggregates_file, analysis_file=None):
+        """
+        读取爬取脚本预先生成的聚合统计
+        
+        统计文件缺失或与新闻文件的 updated_at 不一致时，现场计算。
+        """
+        news_data = self.load_json_file(news_file)
+        if not news_data:
+            return None
+        
+        aggregates = self.load_json_file(aggregates_file)
+        if aggregates and aggregates.get('source_updated_at') == news_data.get('updated_at'):
+            return aggregates
+        
+        analysis_data = self.load_json_file(analysis_file) if analysis_file else None
+        return get_derived(
+            ('aggregates', news_file, analysis_file),
+            (file_generation(news_file), file_generation(analysis_file) if analysis_file else None),
+            lambda: build_news_aggregates(news_data.get('news', []), news_data.get('updated_at'), analysis_data)
+        )
+    
+    def load_time_index(self, collection):
+        """获取新闻集合按发布时间排序的索引"""
+        config = NEWS_COLLECTIONS[collection]
+        aggregates = self.load_aggregates(config['news_file'], config['aggregates_file'])
+        return aggregates['time_index'] if aggregates else None
+    
+    def filter_time_range(self, news_list, query, collection):
+        """按 since/until 参数筛选新闻（在时间索引上二分查找，保持原顺序）"""
+        since = parse_time_param(query, 'since')
+        until = parse_time_param(query, 'until')
+        if since is None and until is None:
+            return news_list
+        
+        time_index = self.load_time_index(collection)
+        return [news_list[position] for position in positions_between(time_index, since, until)]
+    
+    def get_news_histogram(self, query):
+        """获取新闻发布时间分布"""
+        try:
+            bucket = query.get('bucket', ['day'])[0]
+            if bucket not in HISTOGRAM_BUCKETS:
+                return {'success': False, 'error': f'Invalid bucket: {bucket}'}
+            
+            collection = query.get('collection', ['news'])[0]
+            if collection not in NEWS_COLLECTIONS:
+                return {'success': False, 'error': f'Unknown collection: {collection}'}
+            
+            time_index = self.load_time_index(collection)
+            if not time_index:
+                return {'success': False, 'error': 'No news data available'}
+            
+            since = parse_time_param(query, 'since')
+            until = parse_time_param(query, 'until')
+            lo, hi = time_range_bounds(time_index, since, until)
+            
+            # 时间戳已升序排列，相同桶的新闻相邻
+            seconds, fmt = HISTOGRAM_BUCKETS[bucket]
+            histogram = []
+            current_start = None
+            for timestamp in time_index['timestamps'][lo:hi]:
+                start = timestamp - timestamp % seconds
+                if start != current_start:
+                    current_start = start
+                    label = datetime.fromtimestamp(start, tz=timezone.utc).strftime(fmt)
+                    histogram.append({'bucket': label, 'count': 0})
+                histogram[-1]['count'] += 1
             
             return {
                 'success': True,
-                'data': {
-                    'news_total': len(news_list),
-                    'news_today': news_today,
-                    'category_stats': category_stats,
-                    'latest_temperature': {
-                        'temperature_score': analysis_data.get('temperature_score', 50),
-                        'sentiment': analysis_data.get('sentiment', '中性')
-                    } if analysis_data else None,
-                    'updated_at': news_data.get('updated_at')
-                }
+                'bucket': bucket,
+                'collection': collection,
+                'data': histogram,
+                'total': hi - lo
             }
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -198,9 +1040,20 @@ class handler(BaseHTTPRequestHandler):
             if not news_data:
                 return {'success': False, 'error': 'No Tencent news data available'}
             
+            # 默认返回一整页（不超过 MAX_PAGE_LIMIT 条），保持原有的文档结构
+            news_list = self.filter_time_range(news_data.get('news', []), query, 'tencent')
+            news_list, total, next_cursor = select_news(news_list, query, default_limit=MAX_PAGE_LIMIT)
+            
             return {
                 'success': True,
-                'data': news_data
+                'data': {
+                    'updated_at': news_data.get('updated_at'),
+                    'total_count': news_data.get('total_count', total),
+                    'news': news_list
+                },
+                'count': len(news_list),
+                'total': total,
+                'next_cursor': next_cursor
             }
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -242,26 +1095,107 @@ class handler(BaseHTTPRequestHandler):
             return {'success': False, 'error': str(e)}
     
     def load_json_file(self, filepath):
-        """加载JSON文件"""
+        """加载JSON文件（带进程内缓存）"""
         try:
-            # 尝试从当前目录读取
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            
-            # 尝试从上级目录读取
-            parent_path = os.path.join('..', filepath)
-            if os.path.exists(parent_path):
-                with open(parent_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            
-            # 尝试从根目录读取
-            root_path = os.path.join('/', filepath)
-            if os.path.exists(root_path):
-                with open(root_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            
+            return load_cached_json(filepath)
+        except Exception as e:
+            print(f"Error loading {filepath}: {str(e)}")
             return None
+
+
+# 自托管模式的默认配置
+# 每个连接（包括等待下一个请求的空闲长连接和推送连接）在处理期间占用一个工作线程。
+# 所有连接共用一个大小为 workers + STREAM_MAX_CLIENTS 的线程池：多出的线程只是为推送连接留出余量，
+# 并不专属于推送连接，空闲长连接同样会占用；空闲长连接最多保持 KEEPALIVE_TIMEOUT 秒，
+# 同时打开的连接超过线程池大小时新连接排队等待
+DEFAULT_SERVE_PORT = 8080
+DEFAULT_WORKERS = 16
+KEEPALIVE_TIMEOUT = 2
+
+
+class KeepAliveHandler(handler):
+    """自托管模式使用的处理器：HTTP/1.1 长连接，空闲超时后关闭"""
+    
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+    # 响应头与响应体分开写入，关闭Nagle算法避免长连接上的延迟确认等待
+    disable_nagle_algorithm = True
+
+
+class PooledHTTPServer(HTTPServer):
+    """使用固定大小线程池处理连接的HTTP服务器（所有连接共用 max_workers + STREAM_MAX_CLIENTS 个线程）"""
+    
+    def __init__(self, server_address, handler_class, max_workers=DEFAULT_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers + STREAM_MAX_CLIENTS,
+                                           thread_name_prefix='api-worker')
+    
+    def process_request(self, request, client_address):
+        """将连接交给线程池处理（线程池满时排队等待）"""
+        self.executor.submit(self.process_request_thread, request, client_address)
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    
+    def server_close(self):
+        """停止接受新连接，结束推送连接，并等待处理中的请求完成"""
+        super().server_close()
+        # 推送连接最长保持 STREAM_MAX_DURATION 秒，先通知它们退出，否则线程池要等到全部超时
+        _data_watcher.stop()
+        self.executor.shutdown(wait=True)
+
+
+def warm_cache():
+    """预加载所有路由依赖的数据文件"""
+    for filepath in sorted({f for route in ROUTES.values() for f in route['files']}):
+        try:
+            load_cached_json(filepath)
         except Exception as e:
             print(f"Error loading {filepath}: {str(e)}")
-            return None
\ No newline at end of file
+
+
+def serve(host='0.0.0.0', port=DEFAULT_SERVE_PORT, workers=DEFAULT_WORKERS):
+    """以长期运行的进程提供API服务，进程内的文档与响应缓存在请求间复用"""
+    server = PooledHTTPServer((host, port), KeepAliveHandler, max_workers=workers)
+    
+    def request_shutdown(signum, frame):
+        print(f"Received signal {signum}, shutting down...")
+        # shutdown() 会等待 serve_forever 退出，不能在同一线程中调用
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+    
+    warm_cache()
+    print(f"Serving API on http://{host}:{port} ({workers + STREAM_MAX_CLIENTS} shared workers, "
+          f"keep-alive {KEEPALIVE_TIMEOUT}s)")
+    
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        print("Server stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新闻与ETF数据API')
+    parser.add_argument('--serve', action='store_true', help='以自托管模式启动HTTP服务')
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址')
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVE_PORT, help='监听端口')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='工作线程数（线程池另加推送连接数上限个线程，所有连接共用）')
+    args = parser.parse_args()
+    
+    if not args.serve:
+        parser.print_help()
+        return
+    
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == '__main__':
+    main()
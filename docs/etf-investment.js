@@ -24,16 +24,15 @@ async function loadData() {
                 console.log('  尝试从 Vercel API 获取数据...');
                 const apiBase = window.location.origin;
                 
-                const [strategyResponse, dataResponse] = await Promise.all([
-                    fetch(`${apiBase}/api/etf/strategy`),
-                    fetch(`${apiBase}/api/etf/data`)
-                ]);
+                // 一次请求同时获取策略和行情数据
+                const batchResponse = await fetch(`${apiBase}/api/batch?r=etf.strategy,etf.data`);
                 
-                if (strategyResponse.ok && dataResponse.ok) {
-                    const strategyResult = await strategyResponse.json();
-                    const dataResult = await dataResponse.json();
+                if (batchResponse.ok) {
+                    const batchResult = await batchResponse.json();
+                    const strategyResult = (batchResult.data || {})['etf.strategy'] || {};
+                    const dataResult = (batchResult.data || {})['etf.data'] || {};
                     
-                    if (strategyResult.success && dataResult.success) {
+                    if (batchResult.success && strategyResult.success && dataResult.success) {
                         console.log('✅ 成功从 Vercel API 加载数据');
                         return { 
                             strategy: strategyResult.data, 
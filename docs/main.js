@@ -1,6 +1,10 @@
 // API基础URL - 替换为你的Vercel部署URL（如果不使用Vercel，保持默认即可）
 const API_BASE = 'https://your-vercel-app.vercel.app/api';
 
+// 自托管API服务地址（python api/index.py --serve 启动，如 'https://your-server:8080/api'），
+// 设置后订阅数据更新推送（SSE）；Vercel 函数会缓冲响应且数据只随重新部署更新，不支持推送，保持 null 即可
+const STREAM_API_BASE = null;
+
 // 智能检测数据源
 const USE_LOCAL_DATA = window.location.hostname === 'localhost' || 
                        window.location.hostname === '127.0.0.1' ||
@@ -27,6 +31,27 @@ async function initApp() {
     await loadNews();
     await loadAnalysis();
     initTemperatureChart();
+    subscribeUpdates();
+}
+
+// 订阅数据更新推送（SSE），只重新加载发生变化的部分（仅自托管服务）
+function subscribeUpdates() {
+    if (USE_LOCAL_DATA || !STREAM_API_BASE || !window.EventSource) return;
+    
+    const loaders = {
+        'stats.overview': loadStats,
+        'news.categories': loadCategories,
+        'news.latest': loadNews,
+        'temperature.latest': loadAnalysis
+    };
+    
+    const source = new EventSource(`${STREAM_API_BASE}/stream?r=${Object.keys(loaders).join(',')}`);
+    source.addEventListener('update', (event) => {
+        const update = JSON.parse(event.data);
+        console.log('🔄 数据已更新:', update.resource, update.updated_at);
+        const loader = loaders[update.resource];
+        if (loader) loader();
+    });
 }
 
 // 设置事件监听器
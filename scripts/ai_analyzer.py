@@ -9,6 +9,8 @@ import os
 from typing import List, Dict
 import time
 
+import http_client
+
 # 支持多个免费AI服务
 AI_PROVIDERS = {
     'groq': {
@@ -201,7 +203,7 @@ class AINewsAnalyzer:
             print(f"API URL: {self.config['api_url']}")
             print(f"Model: {self.config['model']}")
             
-            response = requests.post(
+            response = http_client.post(
                 self.config['api_url'],
                 headers=headers,
                 json=payload,
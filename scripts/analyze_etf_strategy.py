@@ -9,184 +9,46 @@ import os
 import sys
 from datetime import datetime
 
+import numpy as np
+
 # 添加scripts目录到路径
 sys.path.insert(0, os.path.dirname(__file__))
 
 from etf_ai_analyzer import analyze_etf_with_ai
+from strategy_rules import (features_from_etf_data, sentiment_level, sentiment_scores,
+                            signal_dict, trading_signals)
 
 def analyze_market_sentiment(etf_data):
     """
     分析市场情绪
+    评分规则见 strategy_rules.sentiment_scores
     """
-    realtime = etf_data['realtime']
-    indicators = etf_data['indicators']
-    
-    sentiment_score = 50  # 中性基准
-    
-    # 价格趋势 (30%)
-    change_percent = realtime.get('change_percent', 0)
-    if change_percent > 2:
-        sentiment_score += 15
-    elif change_percent > 0:
-        sentiment_score += 8
-    elif change_percent > -2:
-        sentiment_score -= 8
-    else:
-        sentiment_score -= 15
-    
-    # RSI指标 (25%)
-    rsi = indicators.get('rsi', 50)
-    if rsi > 70:
-        sentiment_score -= 10  # 超买
-    elif rsi > 60:
-        sentiment_score += 5
-    elif rsi > 40:
-        sentiment_score += 10
-    elif rsi > 30:
-        sentiment_score += 5
-    else:
-        sentiment_score -= 10  # 超卖
-    
-    # MACD指标 (25%)
-    macd = indicators.get('macd', {})
-    if macd.get('macd', 0) > 0 and macd.get('dif', 0) > macd.get('dea', 0):
-        sentiment_score += 12
-    elif macd.get('macd', 0) > 0:
-        sentiment_score += 6
-    elif macd.get('dif', 0) > macd.get('dea', 0):
-        sentiment_score += 3
-    else:
-        sentiment_score -= 8
-    
-    # 均线系统 (20%)
-    ma5 = indicators.get('ma5', 0)
-    ma10 = indicators.get('ma10', 0)
-    ma20 = indicators.get('ma20', 0)
-    current = realtime.get('current', 0)
-    
-    if current > ma5 > ma10 > ma20:
-        sentiment_score += 10  # 多头排列
-    elif current > ma5 > ma10:
-        sentiment_score += 5
-    elif current < ma5 < ma10 < ma20:
-        sentiment_score -= 10  # 空头排列
-    elif current < ma5 < ma10:
-        sentiment_score -= 5
-    
-    # 限制在0-100范围
-    sentiment_score = max(0, min(100, sentiment_score))
-    
-    # 情绪分类
-    if sentiment_score >= 70:
-        sentiment = "强烈看多"
-        emoji = "🚀"
-    elif sentiment_score >= 60:
-        sentiment = "看多"
-        emoji = "📈"
-    elif sentiment_score >= 50:
-        sentiment = "偏多"
-        emoji = "😊"
-    elif sentiment_score >= 40:
-        sentiment = "中性"
-        emoji = "😐"
-    elif sentiment_score >= 30:
-        sentiment = "偏空"
-        emoji = "😟"
-    else:
-        sentiment = "看空"
-        emoji = "📉"
-    
-    return {
-        'score': round(sentiment_score, 1),
-        'sentiment': sentiment,
-        'emoji': emoji
-    }
+    features = features_from_etf_data([etf_data])
+    return sentiment_level(sentiment_scores(features)[0])
 
 def generate_trading_signal(etf_data, sentiment):
     """
     生成交易信号
+    评分规则见 strategy_rules.trading_signals
     """
-    realtime = etf_data['realtime']
-    indicators = etf_data['indicators']
-    sentiment_score = sentiment['score']
-    
-    # 综合评分
-    buy_signals = 0
-    sell_signals = 0
-    
-    # 1. 情绪评分
-    if sentiment_score >= 65:
-        buy_signals += 2
-    elif sentiment_score >= 55:
-        buy_signals += 1
-    elif sentiment_score <= 35:
-        sell_signals += 2
-    elif sentiment_score <= 45:
-        sell_signals += 1
-    
-    # 2. RSI
-    rsi = indicators.get('rsi', 50)
-    if rsi < 30:
-        buy_signals += 2  # 超卖
-    elif rsi < 40:
-        buy_signals += 1
-    elif rsi > 70:
-        sell_signals += 2  # 超买
-    elif rsi > 60:
-        sell_signals += 1
-    
-    # 3. MACD金叉死叉
-    macd = indicators.get('macd', {})
-    if macd.get('dif', 0) > macd.get('dea', 0) and macd.get('macd', 0) > 0:
-        buy_signals += 2  # 金叉
-    elif macd.get('dif', 0) < macd.get('dea', 0) and macd.get('macd', 0) < 0:
-        sell_signals += 2  # 死叉
-    
-    # 4. 价格与布林带
-    bollinger = indicators.get('bollinger', {})
-    current = realtime.get('current', 0)
-    if current < bollinger.get('lower', 0):
-        buy_signals += 1  # 触及下轨
-    elif current > bollinger.get('upper', 0):
-        sell_signals += 1  # 触及上轨
-    
-    # 5. 成交量
-    volume_change = indicators.get('volume_change', 0)
-    change_percent = realtime.get('change_percent', 0)
-    if volume_change > 50 and change_percent > 0:
-        buy_signals += 1  # 放量上涨
-    elif volume_change > 50 and change_percent < 0:
-        sell_signals += 1  # 放量下跌
-    
-    # 生成建议
-    if buy_signals >= 5:
-        action = "强烈建议买入"
-        action_code = "strong_buy"
-        confidence = 90
-    elif buy_signals >= 3:
-        action = "建议买入"
-        action_code = "buy"
-        confidence = 75
-    elif sell_signals >= 5:
-        action = "建议卖出"
-        action_code = "sell"
-        confidence = 85
-    elif sell_signals >= 3:
-        action = "建议减仓"
-        action_code = "reduce"
-        confidence = 70
-    else:
-        action = "建议持有"
-        action_code = "hold"
-        confidence = 60
+    features = features_from_etf_data([etf_data])
+    signals = trading_signals(features, np.array([sentiment['score']]))
+    return signal_dict(signals['buy_signals'][0], signals['sell_signals'][0], signals['action'][0])
+
+def score_etfs(etf_data_list):
+    """
+    一次计算所有ETF的市场情绪和交易信号
     
-    return {
-        'action': action,
-        'action_code': action_code,
-        'confidence': confidence,
-        'buy_signals': buy_signals,
-        'sell_signals': sell_signals
-    }
+    Returns:
+        [(情绪, 信号)]，与 etf_data_list 一一对应
+    """
+    features = features_from_etf_data(etf_data_list)
+    scores = sentiment_scores(features)
+    signals = trading_signals(features, scores)
+    return [
+        (sentiment_level(score), signal_dict(buy, sell, action))
+        for score, buy, sell, action in zip(scores, signals['buy_signals'], signals['sell_signals'], signals['action'])
+    ]
 
 def identify_risks(etf_data, sentiment, signal):
     """
@@ -307,18 +169,17 @@ def main():
     
     print(f"\n加载了 {len(etf_data_list)} 只ETF数据")
     
-    # 分析每只ETF
+    # 所有ETF的市场情绪和交易信号一次算出
+    scored = score_etfs(etf_data_list)
     analysis_results = []
     
-    for etf_data in etf_data_list:
+    for etf_data, (sentiment, signal) in zip(etf_data_list, scored):
         print(f"\n分析 {etf_data['name']}({etf_data['code']})...")
         
         # 市场情绪分析
-        sentiment = analyze_market_sentiment(etf_data)
         print(f"  市场情绪: {sentiment['emoji']} {sentiment['sentiment']} (评分: {sentiment['score']})")
         
         # 交易信号
-        signal = generate_trading_signal(etf_data, sentiment)
         print(f"  投资建议: {signal['action']} (置信度: {signal['confidence']}%)")
         
         # 风险识别
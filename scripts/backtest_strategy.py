@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+策略回测脚本
+用本地K线存储回放历史，逐日重新计算 analyze_etf_strategy.py 的情绪评分和交易信号
+（整个ETF列表的所有交易日一次批量计算），按信号模拟持仓并计入手续费和滑点，
+输出每只ETF的信号胜率、年化收益、最大回撤和换手率，以及各类建议的实际胜率
+
+持仓规则：当天收盘后按信号调整仓位，从下一个交易日开始承担涨跌
+    强烈建议买入 / 建议买入 -> 满仓，建议减仓 -> 半仓，建议卖出 -> 空仓，建议持有 -> 不变
+停牌日和历史不足的日期不交易
+
+用法:
+    python scripts/backtest_strategy.py
+    python scripts/backtest_strategy.py --years 5 --fee 0.0003 --slippage 0.0005 --horizon 5 --output data/backtest.json
+"""
+
+from datetime import datetime
+from typing import Dict
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fetch_etf_data import load_etf_universe
+from kline_store import KlineStore
+from price_matrix import build_price_matrix, compute_matrix
+from strategy_rules import ACTIONS, BUY, HOLD, REDUCE, SELL, STRONG_BUY
+
+TRADING_DAYS_PER_YEAR = 252
+
+# 每种建议对应的目标仓位，NaN 表示维持原仓位
+TARGET_POSITIONS = np.full(len(ACTIONS), np.nan)
+TARGET_POSITIONS[[STRONG_BUY, BUY, REDUCE, SELL]] = [1.0, 1.0, 0.5, 0.0]
+
+# 看多 / 看空的建议（用于计算胜率）
+BULLISH_ACTIONS = [STRONG_BUY, BUY]
+BEARISH_ACTIONS = [REDUCE, SELL]
+
+
+def forward_fill(values: np.ndarray, initial: float = 0.0) -> np.ndarray:
+    """沿最后一维用最近一个非 NaN 值填充，开头的 NaN 用 initial"""
+    positions = np.arange(values.shape[-1])
+    last = np.maximum.accumulate(np.where(np.isnan(values), -1, positions), axis=-1)
+    filled = np.take_along_axis(values, np.maximum(last, 0), axis=-1)
+    return np.where(last >= 0, filled, initial)
+
+
+def run_backtest(matrix: Dict, result: Dict, years: float = 5, fee: float = 0.0003,
+                 slippage: float = 0.0005, horizon: int = 5) -> Dict:
+    """
+    按逐日信号回测
+
+    Args:
+        matrix: build_price_matrix 的结果
+        result: compute_matrix 的结果
+        years: 回测最近多少年（不足时使用全部历史）
+        fee: 单边手续费率
+        slippage: 单边滑点（按成交金额比例）
+        horizon: 计算信号胜率时向后看的交易日数
+
+    Returns:
+        {'etfs': 每只ETF的指标, 'actions': 各类建议的胜率, 'start_date', 'end_date'}
+    """
+    close = result['series']['close']
+    valid = result['valid']
+    action = result['action']
+    count, length = close.shape
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.zeros_like(close)
+        returns[:, 1:] = np.nan_to_num(close[:, 1:] / close[:, :-1] - 1)
+        forward = np.full_like(close, np.nan)
+        forward[:, :-horizon] = close[:, horizon:] / close[:, :-horizon] - 1
+
+    # 回测窗口：最近 years 年中该ETF已有足够历史的交易日
+    window_start = max(length - int(years * TRADING_DAYS_PER_YEAR), 0)
+    columns = np.arange(length)
+    active = (columns >= window_start) & (np.cumsum(valid, axis=-1) > 0)
+
+    # 仓位：收盘后按信号调整，下一交易日起生效
+    target = np.where(valid, TARGET_POSITIONS[action], np.nan)
+    position = np.where(active, forward_fill(target), 0.0)
+    held = np.zeros_like(position)
+    held[:, 1:] = position[:, :-1]
+    trades = np.abs(np.diff(position, axis=-1, prepend=0.0))
+
+    daily = held * returns - trades * (fee + slippage)
+    equity = np.cumprod(1 + np.where(active, daily, 0.0), axis=-1)
+    drawdown = equity / np.maximum.accumulate(equity, axis=-1) - 1
+
+    active_days = active.sum(axis=-1)
+    active_years = np.maximum(active_days / TRADING_DAYS_PER_YEAR, 1e-9)
+    first_active = np.argmax(active, axis=-1)
+    rows = np.arange(count)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = equity[:, -1] ** (1 / active_years) - 1
+        benchmark = (close[:, -1] / close[rows, first_active]) ** (1 / active_years) - 1
+    turnover = (trades * active).sum(axis=-1) / active_years
+
+    # 信号胜率：看多信号之后 horizon 天上涨、看空信号之后下跌
+    scored = valid & active & ~np.isnan(forward)
+    bullish = np.isin(action, BULLISH_ACTIONS) & scored
+    bearish = np.isin(action, BEARISH_ACTIONS) & scored
+    with np.errstate(invalid='ignore'):
+        hits = (bullish & (forward > 0)) | (bearish & (forward < 0))
+    signals = bullish | bearish
+    signal_counts = signals.sum(axis=-1)
+
+    etfs = []
+    for row, code in enumerate(matrix['codes']):
+        if not active_days[row]:
+            etfs.append({'code': code, 'days': 0})
+            continue
+        etfs.append({
+            'code': code,
+            'days': int(active_days[row]),
+            'signals': int(signal_counts[row]),
+            'hit_rate': round(float(hits[row].sum() / signal_counts[row]), 4) if signal_counts[row] else None,
+            'cagr': round(float(cagr[row]), 4),
+            'benchmark_cagr': round(float(benchmark[row]), 4),
+            'max_drawdown': round(float(drawdown[row][active[row]].min()), 4),
+            'turnover': round(float(turnover[row]), 2),
+            'final_equity': round(float(equity[row, -1]), 4)
+        })
+
+    # 各类建议在全部ETF上的实际胜率，对照 generate_trading_signal 给出的置信度
+    actions = []
+    for index, (action_code, action_name, confidence) in enumerate(ACTIONS):
+        if index == HOLD:
+            continue
+        selected = (action == index) & scored
+        wins = selected & ((forward > 0) if index in BULLISH_ACTIONS else (forward < 0))
+        total = int(selected.sum())
+        actions.append({
+            'action_code': action_code,
+            'action': action_name,
+            'confidence': confidence,
+            'signals': total,
+            'hit_rate': round(float(wins.sum() / total), 4) if total else None
+        })
+
+    dates = matrix['dates']
+    return {
+        'start_date': str(dates[window_start]) if length else None,
+        'end_date': str(dates[-1]) if length else None,
+        'etfs': etfs,
+        'actions': actions
+    }
+
+
+def _percent(value):
+    return '-' if value is None else f'{value * 100:.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用本地K线回测 analyze_etf_strategy.py 的交易信号')
+    parser.add_argument('--years', type=float, default=5, help='回测最近多少年')
+    parser.add_argument('--fee', type=float, default=0.0003, help='单边手续费率')
+    parser.add_argument('--slippage', type=float, default=0.0005, help='单边滑点')
+    parser.add_argument('--horizon', type=int, default=5, help='信号胜率的观察天数')
+    parser.add_argument('--output', help='结果写入的JSON文件')
+    args = parser.parse_args()
+    if args.horizon < 1:
+        parser.error('--horizon 至少为1')
+    if args.years <= 0:
+        parser.error('--years 必须大于0')
+
+    etfs = load_etf_universe()
+    names = {etf['code']: etf['name'] for etf in etfs}
+    store = KlineStore()
+
+    started = time.perf_counter()
+    matrix = build_price_matrix({etf['code']: store.load(etf['code']) for etf in etfs})
+    report = run_backtest(matrix, compute_matrix(matrix), args.years, args.fee, args.slippage, args.horizon)
+    elapsed = time.perf_counter() - started
+
+    print(f"回测区间: {report['start_date']} ~ {report['end_date']}，{len(etfs)} 只ETF，耗时 {elapsed:.2f} 秒")
+    print(f"手续费 {args.fee * 100:.3f}%，滑点 {args.slippage * 100:.3f}%（单边），胜率观察 {args.horizon} 个交易日")
+    print(f"{'ETF':<16}{'天数':>6}{'信号':>6}{'胜率':>8}{'年化':>9}{'持有年化':>9}{'最大回撤':>9}{'年换手':>8}")
+    for item in report['etfs']:
+        item['name'] = names.get(item['code'], '')
+        label = f"{item['name']}({item['code']})"
+        if not item['days']:
+            print(f"{label:<16}  没有足够的本地K线")
+            continue
+        print(f"{label:<16}{item['days']:>6}{item['signals']:>6}{_percent(item['hit_rate']):>8}"
+              f"{_percent(item['cagr']):>9}{_percent(item['benchmark_cagr']):>9}"
+              f"{_percent(item['max_drawdown']):>9}{item['turnover']:>8.1f}")
+
+    print("\n各类建议的实际胜率:")
+    for item in report['actions']:
+        print(f"  {item['action']}: {item['signals']} 次，胜率 {_percent(item['hit_rate'])}（设定置信度 {item['confidence']}%）")
+
+    if args.output:
+        report['updated_at'] = datetime.now().isoformat()
+        report['settings'] = vars(args)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+HTML转纯文本基准测试
+对比 html_text.html_to_text 与 BeautifulSoup(html, 'html.parser').get_text() 的输出和耗时
+
+用法:
+    python scripts/bench_html_text.py                       # 使用录制的订阅源（cassettes/），没有时使用内置样例
+    python scripts/bench_html_text.py --cassette-dir path --repeat 20
+"""
+
+import argparse
+import base64
+import glob
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bs4 import BeautifulSoup
+
+from feed_parser import iter_feed_items
+from html_text import html_to_text
+
+# 内置样例（与常见订阅源的摘要格式相同）
+SAMPLE_DESCRIPTIONS = [
+    '<a href="https://news.google.com/rss/articles/CBMiK2h0dHBz?oc=5" target="_blank">Fed holds rates steady as inflation cools</a>&nbsp;&nbsp;<font color="#6f6f6f">Reuters</font>',
+    '<ol><li><a href="https://news.google.com/rss/articles/abc?oc=5" target="_blank">Tencent profit beats estimates</a>&nbsp;&nbsp;<font color="#6f6f6f">Bloomberg</font></li>\n<li><a href="https://news.google.com/rss/articles/def?oc=5" target="_blank">WeChat &amp; QQ user growth</a>&nbsp;&nbsp;<font color="#6f6f6f">CNBC</font></li></ol>',
+    '<p>Shares in Europe&#8217;s biggest banks rose on Monday after the ECB&rsquo;s comments &hellip;</p><img src="https://example.com/a.jpg" alt="chart" width="1" height="1" />',
+    'Oil prices fell more than 3% on concerns about slowing global growth.',
+    '<div class="feedflare">\n<a href="http://feeds.feedburner.com/~ff/x?a=1"><img src="http://feeds.feedburner.com/~ff/x?d=2" border="0"></img></a>\n</div><p>UK CPI rose 2.5% year-on-year, below the 2.8% consensus.</p>',
+    '<![CDATA[<p>Markets &lt;open&gt; higher as tech rallies</p>]]>',
+    '中国三季度GDP同比增长5.2%，高于市场预期的4.8%。<br/>消费和投资均有改善。'
+]
+
+
+def load_recorded_descriptions(cassette_dir: str):
+    """从录制的响应中提取订阅源条目的摘要"""
+    descriptions = []
+    for path in glob.glob(os.path.join(cassette_dir, '*', '*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            cassette = json.load(f)
+        for interaction in cassette.get('interactions', []):
+            body = base64.b64decode(interaction['body'])
+            if b'<item' not in body and b'<entry' not in body:
+                continue
+            try:
+                descriptions.extend(entry['description'] for entry in iter_feed_items([body]))
+            except ET.ParseError:
+                continue
+    return [description for description in descriptions if description]
+
+
+def bench(func, descriptions, repeat):
+    """返回每条摘要的平均耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for description in descriptions:
+            func(description)
+    return (time.perf_counter() - started) / (repeat * len(descriptions)) * 1e6
+
+
+def soup_text(description):
+    return BeautifulSoup(description, 'html.parser').get_text().strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比 html_to_text 与 BeautifulSoup 的输出和耗时')
+    parser.add_argument('--cassette-dir', default='cassettes', help='录制目录')
+    parser.add_argument('--repeat', type=int, default=10, help='重复次数')
+    args = parser.parse_args()
+    
+    descriptions = load_recorded_descriptions(args.cassette_dir) if os.path.isdir(args.cassette_dir) else []
+    source = f'录制的订阅源 ({args.cassette_dir})'
+    if not descriptions:
+        descriptions = SAMPLE_DESCRIPTIONS * 50
+        source = '内置样例'
+    
+    mismatches = [d for d in descriptions if html_to_text(d) != soup_text(d)]
+    print(f"样本: {source}，共 {len(descriptions)} 条摘要")
+    print(f"输出一致: {len(descriptions) - len(mismatches)}/{len(descriptions)}")
+    for description in mismatches[:5]:
+        print(f"  不一致: {description[:120]!r}")
+        print(f"    BeautifulSoup: {soup_text(description)[:120]!r}")
+        print(f"    html_to_text:  {html_to_text(description)[:120]!r}")
+    
+    soup_us = bench(soup_text, descriptions, args.repeat)
+    fast_us = bench(html_to_text, descriptions, args.repeat)
+    print(f"BeautifulSoup: {soup_us:8.1f} µs/条")
+    print(f"html_to_text:  {fast_us:8.1f} µs/条  ({soup_us / fast_us:.1f}x)")
+    
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
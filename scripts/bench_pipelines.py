@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+抓取流水线离线基准测试
+用录制的HTTP响应回放 fetch_news / fetch_tencent_news / fetch_etf_data 的 main()，
+统计耗时和CPU时间，可选输出 cProfile 热点
+
+用法:
+    # 联网时录制一次
+    python scripts/bench_pipelines.py --record
+
+    # 离线回放
+    python scripts/bench_pipelines.py --repeat 5 --latency 0.05
+    python scripts/bench_pipelines.py news --profile
+
+录制和回放都在空的临时目录中运行，没有 data/ 下的订阅源缓存和本地K线，
+两次发出的请求完全相同（条件请求不会录成304，K线不会按本地数据增量请求）。
+不要在仓库目录中直接用 HTTP_CASSETTE_MODE=record 运行抓取脚本来录制。
+
+AI分析只在设置了对应 API Key 时才会发请求，回放AI响应时需设置任意值的 Key。
+"""
+
+from contextlib import redirect_stdout
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+PIPELINES = {
+    'news': ('fetch_news', 'main'),
+    'tencent': ('fetch_tencent_news', 'main'),
+    'etf': ('fetch_etf_data', 'main')
+}
+
+
+def run_once(name: str, profiler=None):
+    """在空的临时目录中运行一次流水线（与录制时的初始状态相同，也不会写入仓库的 data/ 目录），返回 (耗时, CPU时间)"""
+    module_name, func_name = PIPELINES[name]
+    func = getattr(__import__(module_name), func_name)
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            started, cpu_started = time.perf_counter(), time.process_time()
+            with redirect_stdout(io.StringIO()):
+                if profiler:
+                    profiler.runcall(func)
+                else:
+                    func()
+            return time.perf_counter() - started, time.process_time() - cpu_started
+        finally:
+            os.chdir(cwd)
+
+
+def record(name: str, cassette_dir: str):
+    """在空的临时目录中联网运行一次流水线并录制响应（子进程，与回放时的初始状态相同）"""
+    module_name, _ = PIPELINES[name]
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'{module_name}.py')
+    env = dict(os.environ, HTTP_CASSETTE_MODE='record', HTTP_CASSETTE_DIR=os.path.abspath(cassette_dir))
+    with tempfile.TemporaryDirectory() as workdir:
+        subprocess.run([sys.executable, script], cwd=workdir, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回放录制的HTTP响应，对抓取流水线做基准测试')
+    parser.add_argument('pipelines', nargs='*', help=f"要测试的流水线: {', '.join(PIPELINES)}（默认全部）")
+    parser.add_argument('--cassette-dir', default='cassettes', help='录制目录')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求注入的延迟（秒）')
+    parser.add_argument('--repeat', type=int, default=3, help='每条流水线运行次数')
+    parser.add_argument('--profile', action='store_true', help='输出 cProfile 热点')
+    parser.add_argument('--record', action='store_true', help='联网录制响应（不做基准测试）')
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.pipelines if name not in PIPELINES]
+    if unknown:
+        parser.error(f"未知的流水线: {', '.join(unknown)}")
+    
+    if args.record:
+        for name in args.pipelines or list(PIPELINES):
+            print(f"录制 {name} -> {args.cassette_dir}")
+            record(name, args.cassette_dir)
+        return
+    
+    if not os.path.isdir(args.cassette_dir):
+        parser.error(f'录制目录不存在: {args.cassette_dir}（先用 --record 录制）')
+    
+    os.environ['HTTP_CASSETTE_MODE'] = 'replay'
+    os.environ['HTTP_CASSETTE_DIR'] = os.path.abspath(args.cassette_dir)
+    os.environ['HTTP_CASSETTE_LATENCY'] = str(args.latency)
+    
+    print(f"回放目录: {args.cassette_dir}, 注入延迟: {args.latency * 1000:.0f} ms")
+    print(f"{'流水线':<10}{'最短耗时':>12}{'平均耗时':>12}{'平均CPU':>12}")
+    
+    for name in args.pipelines or list(PIPELINES):
+        profiler = cProfile.Profile() if args.profile else None
+        results = [run_once(name, profiler) for _ in range(args.repeat)]
+        wall = [elapsed for elapsed, cpu in results]
+        cpu = [cpu for elapsed, cpu in results]
+        print(f"{name:<10}{min(wall) * 1000:>10.1f}ms{sum(wall) / len(wall) * 1000:>10.1f}ms"
+              f"{sum(cpu) / len(cpu) * 1000:>10.1f}ms")
+        
+        if profiler:
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,7 @@ from typing import Dict, List, Optional
 sys.path.insert(0, os.path.dirname(__file__))
 
 from ai_analyzer import get_analyzer
+import http_client
 
 
 class ETFAIAnalyzer:
@@ -78,6 +79,10 @@ class ETFAIAnalyzer:
             
             macd = indicators.get('macd', {})
             prompt += f"- MACD: DIF={macd.get('dif', 0)}, DEA={macd.get('dea', 0)}\n"
+            last_cross = macd.get('last_cross')
+            if last_cross:
+                cross_name = '金叉' if last_cross['direction'] == 'golden' else '死叉'
+                prompt += f"- MACD最近交叉: {last_cross['bars_ago']}个交易日前{cross_name}\n"
             
             bollinger = indicators.get('bollinger', {})
             prompt += f"- 布林带: 上轨={bollinger.get('upper', 0)}, "
@@ -194,7 +199,7 @@ class ETFAIAnalyzer:
             print(f"Model: {self.analyzer.config['model']}")
             
             # 发送请求
-            response = requests.post(
+            response = http_client.post(
                 self.analyzer.config['api_url'],
                 headers=headers,
                 json=payload,
@@ -0,0 +1,82 @@
+"""
+订阅源条件请求缓存
+按订阅源URL保存 ETag / Last-Modified 和上次解析出的新闻，
+下次请求时带上 If-None-Match / If-Modified-Since，源未更新（304）时直接复用
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+import os
+
+
+class FeedCache:
+    """订阅源验证器与解析结果的持久化存储"""
+
+    def __init__(self, filepath: str):
+        """
+        Args:
+            filepath: 缓存文件路径，如 data/feed_cache.json
+        """
+        self.filepath = filepath
+        self.entries = {}
+        self.hits = 0
+
+        if os.path.exists(filepath):
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('feeds', {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️  订阅源缓存读取失败，将重新获取: {str(e)}")
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """返回该URL的条件请求头（没有缓存时为空）"""
+        entry = self.entries.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def cached_items(self, url: str, response) -> Optional[List[Dict]]:
+        """
+        响应为304时返回上次解析出的新闻，否则返回None
+        """
+        entry = self.entries.get(url)
+        if response.status_code != 304 or not entry:
+            return None
+
+        self.hits += 1
+        entry['checked_at'] = datetime.now().isoformat()
+        return entry.get('items', [])
+
+    def store(self, url: str, response, items: List[Dict]):
+        """保存200响应的验证器和解析结果；源不支持条件请求时删除缓存"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        if not etag and not last_modified:
+            self.entries.pop(url, None)
+            return
+
+        now = datetime.now().isoformat()
+        self.entries[url] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'items': items,
+            'fetched_at': now,
+            'checked_at': now
+        }
+
+    def save(self):
+        """写回缓存文件"""
+        os.makedirs(os.path.dirname(self.filepath) or '.', exist_ok=True)
+        with open(self.filepath, 'w', encoding='utf-8') as f:
+            json.dump({
+                'updated_at': datetime.now().isoformat(),
+                'feeds': self.entries
+            }, f, ensure_ascii=False, indent=2)
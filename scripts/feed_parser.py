@@ -0,0 +1,165 @@
+"""
+流式RSS/Atom解析模块
+用 XMLPullParser 边下载边解析，每解析完一条就产出，达到条数上限后停止读取连接，
+内存占用和首条耗时与订阅源大小无关
+"""
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import xml.etree.ElementTree as ET
+
+# 每次从连接读取的字节数
+CHUNK_SIZE = 16 * 1024
+
+# RSS 的 <item> 和 Atom 的 <entry>
+ITEM_TAGS = {'item', 'entry'}
+
+
+def entry_id(link: str) -> int:
+    """由链接生成跨运行稳定的条目ID（内置 hash() 在每个进程中随机化，不能用于比较两次抓取）"""
+    return int(hashlib.sha1(link.encode('utf-8')).hexdigest()[:12], 16)
+
+
+def _local_name(tag: str) -> str:
+    """去掉命名空间前缀，如 {http://www.w3.org/2005/Atom}entry -> entry"""
+    return tag.rsplit('}', 1)[-1] if '}' in tag else tag
+
+
+def _child_text(elem, *names: str) -> str:
+    """按顺序查找第一个存在的子元素并返回其文本（含嵌套元素的文本）"""
+    children = {}
+    for child in elem:
+        children.setdefault(_local_name(child.tag), child)
+
+    for name in names:
+        child = children.get(name)
+        if child is not None:
+            return ''.join(child.itertext()).strip()
+    return ''
+
+
+def _entry_link(elem) -> str:
+    """RSS 的 <link> 文本，或 Atom 中 rel=alternate（或第一个）<link> 的 href"""
+    fallback = ''
+    for child in elem:
+        if _local_name(child.tag) != 'link':
+            continue
+        href = child.get('href')
+        if href is None:
+            return (child.text or '').strip()
+        if child.get('rel', 'alternate') == 'alternate':
+            return href
+        fallback = fallback or href
+    return fallback
+
+
+def normalize_date(value: str) -> Optional[str]:
+    """
+    把 RFC 822（RSS）或 ISO 8601（Atom）日期转为 isoformat
+
+    UTC 时间输出为不带时区的格式，与原先 strptime(..., '%Z') 的结果一致；
+    无法解析时返回None。
+    """
+    if not value:
+        return None
+
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+
+    if parsed.tzinfo is not None and parsed.utcoffset().total_seconds() == 0:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def normalize_entry(elem) -> Dict[str, str]:
+    """把 RSS item 或 Atom entry 转为统一字段"""
+    return {
+        'title': _child_text(elem, 'title'),
+        'description': _child_text(elem, 'description', 'summary', 'content', 'encoded'),
+        'link': _entry_link(elem),
+        'published': _child_text(elem, 'pubDate', 'published', 'updated', 'date')
+    }
+
+
+def iter_feed_items(chunks: Iterable[bytes], limit: Optional[int] = None) -> Iterator[Dict[str, str]]:
+    """
+    流式解析订阅源
+
+    Args:
+        chunks: 字节块迭代器（如 response.iter_content()）
+        limit: 最多产出的条数，达到后立即停止读取
+
+    Yields:
+        {'title', 'description', 'link', 'published'}
+    """
+    if limit is not None and limit <= 0:
+        return
+
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+    count = 0
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            if _local_name(elem.tag) not in ITEM_TAGS:
+                continue
+
+            yield normalize_entry(elem)
+
+            # 解析完的条目从树中移除，避免整棵树留在内存里
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+    parser.close()
+
+
+def read_feed(response, limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    从流式响应（stream=True）中读取订阅源条目，读完或达到上限后关闭响应
+
+    已解析出部分条目后遇到XML错误时返回已解析的部分。
+    """
+    entries = []
+    try:
+        if response.status_code != 200:
+            return entries
+        for entry in iter_feed_items(response.iter_content(CHUNK_SIZE), limit):
+            entries.append(entry)
+    except ET.ParseError:
+        if not entries:
+            raise
+    finally:
+        response.close()
+    return entries
+
+
+async def fetch_feed(engine, url: str, limit: int, headers: Optional[Dict[str, str]] = None,
+                     timeout: float = 10) -> Tuple[object, List[Dict[str, str]]]:
+    """
+    通过抓取引擎流式获取并解析订阅源
+
+    Returns:
+        (响应, 条目列表)；非200响应（如304）的条目列表为空
+    """
+    def process(response):
+        return response, read_feed(response, limit)
+
+    return await engine.get(url, headers=headers, timeout=timeout, stream=True, process=process)
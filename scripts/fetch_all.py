@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+合并抓取脚本
+在同一个事件循环中运行经济新闻、腾讯新闻和ETF数据三条抓取流水线，
+共享一个抓取引擎（按主机限速与全局并发上限），抓取完成后依次分析并保存
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import fetch_engine
+import fetch_etf_data
+import fetch_news
+import fetch_tencent_news
+import http_client
+
+
+async def fetch_everything(engine):
+    """并发运行三条抓取流水线，单条流水线失败不影响其他流水线"""
+    return await asyncio.gather(
+        fetch_news.fetch_economic_news_async(engine),
+        fetch_tencent_news.fetch_tencent_news_async(engine),
+        fetch_etf_data.fetch_all_etf_data_async(engine),
+        return_exceptions=True
+    )
+
+
+def main():
+    """主函数"""
+    print("=" * 60)
+    print("全部数据抓取任务")
+    print(f"执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+    
+    started = time.monotonic()
+    news_list, tencent_news, etf_data = fetch_engine.run(fetch_everything)
+    print(f"\n抓取耗时: {time.monotonic() - started:.1f} 秒")
+    
+    # (名称, 抓取结果, 失败时的空结果, 保存函数)
+    steps = [
+        ('经济新闻', news_list, [], fetch_news.analyze_and_save),
+        ('腾讯新闻', tencent_news, [], fetch_tencent_news.analyze_and_save),
+        ('ETF数据', etf_data, ([], []), lambda result: fetch_etf_data.save_etf_data(*result))
+    ]
+    for name, result, empty, finish in steps:
+        if isinstance(result, Exception):
+            print(f"\n⚠️  {name}抓取失败: {str(result)}")
+            result = empty
+        finish(result)
+    
+    http_client.print_connection_stats()
+
+
+if __name__ == '__main__':
+    main()
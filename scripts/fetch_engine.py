@@ -0,0 +1,176 @@
+"""
+异步抓取引擎
+所有爬虫共享的请求调度：按主机令牌桶限速、全局并发上限、超时、带抖动的重试与取消
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+import asyncio
+import random
+
+import requests
+
+import http_client
+from http_cassette import is_replaying
+from rate_limiter import HostRateLimiter
+
+# 需要重试的HTTP状态码
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 默认的主机限速（每秒请求数），未列出的主机使用 FetchEngine 的 rate 参数
+DEFAULT_HOST_RATES = {
+    'hq.sinajs.cn': 2.0,
+    'push2his.eastmoney.com': 2.0
+}
+
+
+class FetchEngine:
+    """
+    异步抓取引擎
+    
+    请求在线程池中用 requests 执行，事件循环负责调度：同一主机的请求按令牌桶
+    间隔发送，不同主机的请求并发进行，总并发数不超过 max_concurrency。
+    引擎自己负责重试（异步退避不占用工作线程），因此使用不带重试的连接池 Session。
+    """
+    
+    def __init__(self, max_concurrency: int = 8, rate: float = 1.0, burst: int = 1,
+                 host_rates: Optional[Dict[str, float]] = None, timeout: float = 10,
+                 retries: int = 2, backoff: float = 0.5, max_backoff: float = 8.0):
+        """
+        初始化抓取引擎
+        
+        Args:
+            max_concurrency: 全局并发请求上限
+            rate: 每个主机默认每秒请求数
+            burst: 每个主机允许的突发请求数
+            host_rates: 指定主机的每秒请求数
+            timeout: 默认的单次请求超时（秒，包含读取响应体）
+            retries: 超时、连接错误或可重试状态码时的重试次数
+            backoff: 重试退避的基础秒数（指数增长并加入随机抖动）
+            max_backoff: 单次退避的最长秒数
+        """
+        rates = dict(DEFAULT_HOST_RATES)
+        rates.update(host_rates or {})
+        # 回放录制的响应时不需要限速
+        self.limiter = None if is_replaying() else HostRateLimiter(rate=rate, burst=burst, overrides=rates)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='fetch')
+        self.session = http_client.create_session(retries=0, pool_maxsize=max_concurrency)
+        self._semaphore = None
+        self._tasks = set()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """取消未完成的任务并关闭线程池"""
+        self.cancel()
+        self.executor.shutdown(wait=False)
+    
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # 在首次使用时创建，确保绑定到当前运行的事件循环
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
+    def submit(self, coro) -> asyncio.Task:
+        """提交一个抓取任务，引擎关闭或调用 cancel() 时会被取消"""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+    
+    def cancel(self):
+        """取消所有通过 submit() 提交且未完成的任务"""
+        for task in list(self._tasks):
+            task.cancel()
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+    
+    def _send(self, method: str, url: str, timeout: float, process: Optional[Callable],
+              retry_status: bool, kwargs: Dict):
+        """在工作线程中发送请求；状态码需要重试时返回 (True, 响应)"""
+        response = self.session.request(method, url, timeout=timeout, **kwargs)
+        if retry_status and response.status_code in RETRY_STATUSES:
+            response.close()
+            return True, response
+        if process is not None:
+            return False, process(response)
+        return False, response
+    
+    async def request(self, method: str, url: str, process: Optional[Callable] = None,
+                      timeout: Optional[float] = None, retries: Optional[int] = None, **kwargs):
+        """
+        发送请求
+        
+        Args:
+            method: HTTP方法
+            url: 请求地址
+            process: 在工作线程中处理响应的函数（如流式解析），其返回值作为结果
+            timeout: 本次请求的超时秒数
+            retries: 本次请求的重试次数
+            **kwargs: 传给 requests.request 的其他参数
+        
+        Returns:
+            process 的返回值；未指定 process 时返回 requests.Response
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        loop = asyncio.get_running_loop()
+        
+        for attempt in range(retries + 1):
+            last_attempt = attempt == retries
+            wait = self.limiter.reserve(url) if self.limiter else 0
+            if wait > 0:
+                await asyncio.sleep(wait)
+            
+            try:
+                async with self.semaphore:
+                    call = partial(self._send, method, url, timeout, process, not last_attempt, kwargs)
+                    should_retry, result = await asyncio.wait_for(
+                        loop.run_in_executor(self.executor, call), timeout=timeout
+                    )
+                if not should_retry:
+                    return result
+            except asyncio.TimeoutError:
+                if last_attempt:
+                    raise requests.exceptions.Timeout(f'Request timed out after {timeout}s: {url}')
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if last_attempt:
+                    raise
+            
+            await asyncio.sleep(self._backoff_delay(attempt))
+    
+    async def get(self, url: str, **kwargs):
+        """发送GET请求"""
+        return await self.request('GET', url, **kwargs)
+    
+    async def post(self, url: str, **kwargs):
+        """发送POST请求"""
+        return await self.request('POST', url, **kwargs)
+
+
+def run(coro_factory: Callable, **engine_options):
+    """
+    在新的事件循环中运行抓取协程
+    
+    Args:
+        coro_factory: 接收 FetchEngine 并返回协程的函数
+        **engine_options: 传给 FetchEngine 的参数
+    """
+    async def main():
+        async with FetchEngine(**engine_options) as engine:
+            return await coro_factory(engine)
+    
+    return asyncio.run(main())
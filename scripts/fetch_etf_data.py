@@ -1,71 +1,191 @@
 #!/usr/bin/env python3
 """
 ETF数据爬取脚本
-爬取机器人ETF(159770)和信创ETF(515860)的实时数据
+从 config/etf_universe.json 读取ETF列表，并发获取实时行情、历史K线、技术指标和相关新闻
 """
 
-import requests
+import asyncio
 import json
 import os
+import re
+import sys
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
-import time
 
-def fetch_etf_realtime_data(etf_code):
+sys.path.insert(0, os.path.dirname(__file__))
+
+import fetch_engine
+import http_client
+from indicator_state import load_states, save_states, sync_state
+from indicators import calculate_technical_indicators
+from kline_store import KlineStore, merge_klines, needs_full_reload, next_fetch_start, settled_klines
+
+# ETF列表配置文件（可用环境变量 ETF_UNIVERSE_FILE 指定其他文件）
+# 默认路径相对于本脚本解析，不依赖当前工作目录
+ETF_UNIVERSE_FILE = os.getenv(
+    'ETF_UNIVERSE_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'etf_universe.json')
+)
+
+# 交易所代码 -> 东方财富 secid 前缀
+EASTMONEY_MARKETS = {'sz': '0', 'sh': '1'}
+
+# 同时处理的ETF数（每只ETF的K线、指标和新闻阶段在这个上限内与其他ETF重叠执行）
+ETF_PIPELINE_CONCURRENCY = 8
+
+# 本地没有K线时下载的交易日数（约5年，满足 backtest_strategy.py 的默认回测区间和指标预热）
+KLINE_HISTORY_DAYS = 1300
+
+# 新浪行情接口单次请求的最多代码数（控制URL长度）
+SINA_QUOTE_BATCH_SIZE = 100
+
+# 新浪行情返回的每一行: var hq_str_sz159770="名称,开盘价,...";
+SINA_QUOTE_PATTERN = re.compile(r'var hq_str_(?:sh|sz)(\w+)="([^"]*)";')
+
+def default_market(etf_code):
+    """按代码推断交易所（1开头为深圳，其余为上海）"""
+    return 'sz' if etf_code.startswith('1') else 'sh'
+
+def load_etf_universe(filepath=None):
     """
-    获取ETF实时行情数据
-    使用新浪财经API
+    读取ETF列表配置
+    
+    每只ETF包含 code、name、full_name、market、keywords，
+    full_name 缺省为 name，market 缺省按代码推断，keywords 缺省为空
+    
+    Returns:
+        ETF配置列表
     """
-    try:
-        # 新浪财经API
-        if etf_code.startswith('1'):
-            # 深圳ETF
-            api_url = f'https://hq.sinajs.cn/list=sz{etf_code}'
-        else:
-            # 上海ETF
-            api_url = f'https://hq.sinajs.cn/list=sh{etf_code}'
+    filepath = filepath or ETF_UNIVERSE_FILE
+    with open(filepath, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    
+    etfs = []
+    seen_codes = set()
+    for item in config.get('etfs', []):
+        code = str(item.get('code', '')).strip()
+        name = str(item.get('name', '')).strip()
+        if not code or not name:
+            raise ValueError(f"{filepath}: ETF配置缺少 code 或 name: {item}")
+        if code in seen_codes:
+            raise ValueError(f"{filepath}: ETF代码重复: {code}")
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Referer': 'https://finance.sina.com.cn/'
-        }
+        market = item.get('market') or default_market(code)
+        if market not in EASTMONEY_MARKETS:
+            raise ValueError(f"{filepath}: {code} 的 market 只能是 {' / '.join(EASTMONEY_MARKETS)}，当前为 {market}")
         
-        response = requests.get(api_url, headers=headers, timeout=10)
+        seen_codes.add(code)
+        etfs.append({
+            'code': code,
+            'name': name,
+            'full_name': item.get('full_name') or name,
+            'market': market,
+            'keywords': list(item.get('keywords') or [])
+        })
+    
+    return etfs
+
+def sina_symbol(etf_code, market=None):
+    """ETF代码转为新浪行情代码，如 sz159770"""
+    return f'{market or default_market(etf_code)}{etf_code}'
+
+def parse_sina_quote(etf_code, data_str):
+    """把一行新浪行情数据转为实时数据字典，字段不全时返回None"""
+    data_parts = data_str.split(',')
+    
+    if len(data_parts) > 30:
+        return {
+            'code': etf_code,
+            'name': data_parts[0],
+            'open': float(data_parts[1]) if data_parts[1] else 0,
+            'pre_close': float(data_parts[2]) if data_parts[2] else 0,
+            'current': float(data_parts[3]) if data_parts[3] else 0,
+            'high': float(data_parts[4]) if data_parts[4] else 0,
+            'low': float(data_parts[5]) if data_parts[5] else 0,
+            'volume': int(data_parts[8]) if data_parts[8] else 0,
+            'amount': float(data_parts[9]) if data_parts[9] else 0,
+            'date': data_parts[30],
+            'time': data_parts[31],
+            'change': round(float(data_parts[3]) - float(data_parts[2]), 4) if data_parts[3] and data_parts[2] else 0,
+            'change_percent': round((float(data_parts[3]) - float(data_parts[2])) / float(data_parts[2]) * 100, 2) if data_parts[2] and float(data_parts[2]) > 0 else 0
+        }
+    
+    return None
+
+def parse_sina_quotes(text):
+    """一次扫描解析新浪行情响应中的所有行，返回 {代码: 实时数据}"""
+    quotes = {}
+    for match in SINA_QUOTE_PATTERN.finditer(text):
+        etf_code, data_str = match.groups()
+        try:
+            quote = parse_sina_quote(etf_code, data_str)
+        except (ValueError, IndexError) as e:
+            print(f"解析{etf_code}实时数据失败: {e}")
+            continue
+        if quote:
+            quotes[etf_code] = quote
+    return quotes
+
+async def fetch_sina_quote_chunk(engine, etf_codes, markets=None):
+    """用一次请求获取一组ETF的实时行情"""
+    markets = markets or {}
+    api_url = 'https://hq.sinajs.cn/list=' + ','.join(sina_symbol(code, markets.get(code)) for code in etf_codes)
+    
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Referer': 'https://finance.sina.com.cn/'
+    }
+    
+    try:
+        response = await engine.get(api_url, headers=headers, timeout=10)
         response.encoding = 'gbk'
         
         if response.status_code == 200:
-            data_str = response.text.split('="')[1].split('";')[0]
-            data_parts = data_str.split(',')
-            
-            if len(data_parts) > 30:
-                return {
-                    'code': etf_code,
-                    'name': data_parts[0],
-                    'open': float(data_parts[1]) if data_parts[1] else 0,
-                    'pre_close': float(data_parts[2]) if data_parts[2] else 0,
-                    'current': float(data_parts[3]) if data_parts[3] else 0,
-                    'high': float(data_parts[4]) if data_parts[4] else 0,
-                    'low': float(data_parts[5]) if data_parts[5] else 0,
-                    'volume': int(data_parts[8]) if data_parts[8] else 0,
-                    'amount': float(data_parts[9]) if data_parts[9] else 0,
-                    'date': data_parts[30],
-                    'time': data_parts[31],
-                    'change': round(float(data_parts[3]) - float(data_parts[2]), 4) if data_parts[3] and data_parts[2] else 0,
-                    'change_percent': round((float(data_parts[3]) - float(data_parts[2])) / float(data_parts[2]) * 100, 2) if data_parts[2] and float(data_parts[2]) > 0 else 0
-                }
+            return parse_sina_quotes(response.text)
     except Exception as e:
-        print(f"获取{etf_code}实时数据失败: {e}")
+        print(f"获取实时数据失败 ({len(etf_codes)} 只ETF): {e}")
     
-    return None
+    return {}
+
+async def fetch_etf_realtime_batch(engine, etf_codes, markets=None):
+    """
+    批量获取ETF实时行情数据
+    使用新浪财经API，每 SINA_QUOTE_BATCH_SIZE 个代码合并为一次请求
+    
+    Args:
+        markets: {代码: 交易所}，未列出的代码按代码推断
+    
+    Returns:
+        {代码: 实时数据}，获取失败的代码不在结果中
+    """
+    etf_codes = list(dict.fromkeys(etf_codes))
+    chunks = [etf_codes[i:i + SINA_QUOTE_BATCH_SIZE] for i in range(0, len(etf_codes), SINA_QUOTE_BATCH_SIZE)]
+    
+    quotes = {}
+    for chunk_quotes in await asyncio.gather(*(fetch_sina_quote_chunk(engine, chunk, markets) for chunk in chunks)):
+        quotes.update(chunk_quotes)
+    return quotes
+
+async def fetch_etf_realtime_data(engine, etf_code):
+    """
+    获取ETF实时行情数据
+    使用新浪财经API
+    """
+    quotes = await fetch_etf_realtime_batch(engine, [etf_code])
+    return quotes.get(etf_code)
 
-def fetch_etf_historical_data(etf_code, days=30):
+async def fetch_etf_historical_data(engine, etf_code, days=KLINE_HISTORY_DAYS, market=None, begin=None):
     """
     获取ETF历史数据
     使用东方财富API
+    
+    Args:
+        days: 最多返回的交易日数（最近的 days 天）
+        begin: 起始日期 YYYYMMDD（包含），用于增量获取
     """
     try:
         # 东方财富历史数据API
-        market = '0' if etf_code.startswith('1') else '1'
+        market = EASTMONEY_MARKETS[market or default_market(etf_code)]
         api_url = f'https://push2his.eastmoney.com/api/qt/stock/kline/get'
         
         params = {
@@ -77,13 +197,15 @@ def fetch_etf_historical_data(etf_code, days=30):
             'end': '20500101',
             'lmt': days
         }
+        if begin:
+            params['beg'] = begin
         
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Referer': 'https://quote.eastmoney.com/'
         }
         
-        response = requests.get(api_url, params=params, headers=headers, timeout=10)
+        response = await engine.get(api_url, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -110,29 +232,56 @@ def fetch_etf_historical_data(etf_code, days=30):
     
     return []
 
-def fetch_etf_news(etf_name, limit=10):
+async def update_etf_history(engine, store, etf):
     """
-    获取ETF相关新闻（优化版）
-    使用多个权威财经新闻源：新浪财经、东方财富、金融界
+    用本地K线存储获取ETF的全部历史K线
+    
+    只请求已存储的最后一天之后的数据；该天收盘价变化（重新复权）或数据不连续时
+    重新下载 KLINE_HISTORY_DAYS 天。当天未收盘的K线参与计算但不写入存储。
+    请求失败时返回本地已有的数据。
     """
-    all_news = []
+    code = etf['code']
+    market = etf.get('market')
+    stored = store.load(code)
+    
+    history = []
+    begin = next_fetch_start(stored)
+    if begin:
+        fetched = await fetch_etf_historical_data(engine, code, KLINE_HISTORY_DAYS, market, begin)
+        if not fetched:
+            return stored
+        if not needs_full_reload(stored, fetched):
+            history = merge_klines(stored, fetched)
+        else:
+            print(f"  ↻ {code} 历史价格已重新复权，重新下载全部K线")
     
-    # 根据ETF名称生成丰富的搜索关键词
-    keywords = generate_search_keywords(etf_name)
+    if not history:
+        history = await fetch_etf_historical_data(engine, code, KLINE_HISTORY_DAYS, market)
+        if not history:
+            return stored
     
-    # 1. 从新浪财经获取新闻
-    sina_news = fetch_sina_finance_news(keywords, limit=5)
-    all_news.extend(sina_news)
+    settled = settled_klines(history)
+    if settled != stored:
+        store.save(code, settled)
     
-    # 2. 从东方财富获取新闻
-    time.sleep(1)  # 避免请求过快
-    eastmoney_news = fetch_eastmoney_news(keywords, limit=5)
-    all_news.extend(eastmoney_news)
+    return history
+
+async def fetch_etf_news(engine, etf_name, limit=10, extra_keywords=None):
+    """
+    获取ETF相关新闻（优化版）
+    使用多个权威财经新闻源：新浪财经、东方财富、金融界
+    三个新闻源并发获取，同一主机的请求间隔由抓取引擎控制
+    """
+    # ETF名称加上配置的关键词
+    keywords = generate_search_keywords(etf_name, extra_keywords)
     
-    # 3. 从金融界获取新闻
-    time.sleep(1)
-    jrj_news = fetch_jrj_news(keywords, limit=5)
-    all_news.extend(jrj_news)
+    # 按新浪财经、东方财富、金融界的顺序合并
+    results = await asyncio.gather(
+        fetch_sina_finance_news(engine, keywords, limit=5),
+        fetch_eastmoney_news(engine, keywords, limit=5),
+        fetch_jrj_news(engine, keywords, limit=5)
+    )
+    all_news = [news for source_news in results for news in source_news]
     
     # 去重并按时间排序
     unique_news = []
@@ -147,45 +296,13 @@ def fetch_etf_news(etf_name, limit=10):
     # 返回指定数量的新闻
     return unique_news[:limit]
 
-def generate_search_keywords(etf_name):
+def generate_search_keywords(etf_name, extra_keywords=None):
     """
-    根据ETF名称生成丰富的搜索关键词
+    生成搜索关键词：ETF名称在前，其后是配置文件中的关键词（去重）
     """
-    keywords = [etf_name]
-    
-    # 机器人ETF相关关键词
-    if '机器人' in etf_name:
-        keywords.extend([
-            '机器人ETF',
-            '机器人产业',
-            '工业机器人',
-            '服务机器人',
-            '人形机器人',
-            '机器人概念股',
-            '智能制造',
-            '自动化设备',
-            '机器人行业',
-            '机器人板块'
-        ])
-    
-    # 信创ETF相关关键词
-    elif '信创' in etf_name:
-        keywords.extend([
-            '信创ETF',
-            '信创产业',
-            '信息技术创新',
-            '国产替代',
-            '自主可控',
-            '信创概念股',
-            '软件国产化',
-            '芯片国产化',
-            '信创板块',
-            '信创行业'
-        ])
-    
-    return keywords
+    return list(dict.fromkeys([etf_name] + list(extra_keywords or [])))
 
-def fetch_sina_finance_news(keywords, limit=5):
+async def fetch_sina_finance_news(engine, keywords, limit=5):
     """
     从新浪财经获取新闻
     """
@@ -201,7 +318,7 @@ def fetch_sina_finance_news(keywords, limit=5):
             'Referer': 'https://finance.sina.com.cn/'
         }
         
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = await engine.get(search_url, headers=headers, timeout=10)
         response.encoding = 'utf-8'
         
         if response.status_code == 200:
@@ -237,7 +354,7 @@ def fetch_sina_finance_news(keywords, limit=5):
     
     return news_items
 
-def fetch_eastmoney_news(keywords, limit=5):
+async def fetch_eastmoney_news(engine, keywords, limit=5):
     """
     从东方财富获取新闻
     """
@@ -253,7 +370,7 @@ def fetch_eastmoney_news(keywords, limit=5):
             'Referer': 'https://www.eastmoney.com/'
         }
         
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = await engine.get(search_url, headers=headers, timeout=10)
         response.encoding = 'utf-8'
         
         if response.status_code == 200:
@@ -289,7 +406,7 @@ def fetch_eastmoney_news(keywords, limit=5):
     
     return news_items
 
-def fetch_jrj_news(keywords, limit=5):
+async def fetch_jrj_news(engine, keywords, limit=5):
     """
     从金融界获取新闻
     """
@@ -305,7 +422,7 @@ def fetch_jrj_news(keywords, limit=5):
             'Referer': 'http://www.jrj.com.cn/'
         }
         
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = await engine.get(search_url, headers=headers, timeout=10)
         response.encoding = 'gbk'
         
         if response.status_code == 200:
@@ -341,179 +458,110 @@ def fetch_jrj_news(keywords, limit=5):
     
     return news_items
 
-def calculate_technical_indicators(historical_data):
-    """
-    计算技术指标
+async def fetch_etf(engine, etf, realtime_data, store=None, states=None):
     """
-    if not historical_data or len(historical_data) < 20:
-        return {}
-    
-    closes = [item['close'] for item in historical_data]
-    volumes = [item['volume'] for item in historical_data]
-    
-    # MA5, MA10, MA20
-    ma5 = sum(closes[-5:]) / 5 if len(closes) >= 5 else closes[-1]
-    ma10 = sum(closes[-10:]) / 10 if len(closes) >= 10 else closes[-1]
-    ma20 = sum(closes[-20:]) / 20 if len(closes) >= 20 else closes[-1]
+    获取单只ETF的历史数据、技术指标和相关新闻
     
-    # RSI (14日)
-    rsi = calculate_rsi(closes, 14)
+    K线 -> 技术指标 和 新闻 两个阶段并发执行
     
-    # MACD
-    macd_data = calculate_macd(closes)
+    Args:
+        realtime_data: 批量获取的实时数据
+        store: 本地K线存储，默认为 data/klines
+        states: {代码: 增量指标状态}，传入时把该ETF的状态推进到最后一根已收盘K线
     
-    # 布林带
-    bollinger = calculate_bollinger_bands(closes, 20)
-    
-    # 成交量变化
-    volume_change = ((volumes[-1] - volumes[-2]) / volumes[-2] * 100) if len(volumes) >= 2 and volumes[-2] > 0 else 0
+    Returns:
+        ETF数据字典
     
+    Raises:
+        ValueError: 没有实时数据
+    """
+    if not realtime_data:
+        raise ValueError('获取实时数据失败')
+    store = store or KlineStore()
+    
+    async def fetch_klines_and_indicators():
+        historical_data = await update_etf_history(engine, store, etf)
+        if states is not None and historical_data:
+            states[etf['code']] = sync_state(states.get(etf['code']), settled_klines(historical_data))
+        return historical_data, calculate_technical_indicators(historical_data)
+    
+    (historical_data, indicators), news = await asyncio.gather(
+        fetch_klines_and_indicators(),
+        fetch_etf_news(engine, etf['name'], 10, etf.get('keywords'))
+    )
+    
+    # 一次输出整块，避免与其他ETF的输出交错
+    print(f"{etf['name']}({etf['code']}):")
+    print(f"  ✓ 实时数据: 当前价 {realtime_data['current']}, 涨跌幅 {realtime_data['change_percent']}%")
+    print(f"  ✓ 历史数据: {len(historical_data)} 条")
+    print(f"  ✓ 技术指标: RSI={indicators.get('rsi', 0)}, MA5={indicators.get('ma5', 0)}")
+    print(f"  ✓ 相关新闻: {len(news)} 条")
+    
+    # 汇总数据
     return {
-        'ma5': round(ma5, 3),
-        'ma10': round(ma10, 3),
-        'ma20': round(ma20, 3),
-        'rsi': round(rsi, 2),
-        'macd': macd_data,
-        'bollinger': bollinger,
-        'volume_change': round(volume_change, 2)
+        'code': etf['code'],
+        'name': etf['name'],
+        'full_name': etf['full_name'],
+        'realtime': realtime_data,
+        'historical': historical_data[-10:],  # 只保留最近10天
+        'indicators': indicators,
+        'news': news,
+        'updated_at': datetime.now().isoformat()
     }
 
-def calculate_rsi(prices, period=14):
-    """计算RSI指标"""
-    if len(prices) < period + 1:
-        return 50
-    
-    gains = []
-    losses = []
-    
-    for i in range(1, len(prices)):
-        change = prices[i] - prices[i-1]
-        if change > 0:
-            gains.append(change)
-            losses.append(0)
-        else:
-            gains.append(0)
-            losses.append(abs(change))
-    
-    avg_gain = sum(gains[-period:]) / period
-    avg_loss = sum(losses[-period:]) / period
-    
-    if avg_loss == 0:
-        return 100
+async def fetch_all_etf_data_async(engine, etfs=None, store=None):
+    """
+    并发获取所有ETF的数据（在抓取引擎的事件循环中执行）
     
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
+    实时行情按批一次获取，之后每只ETF独立走 K线/指标/新闻 流水线，
+    最多 ETF_PIPELINE_CONCURRENCY 只同时进行；单只ETF失败不影响其他ETF。
+    完成后保存增量指标状态，供 intraday_indicators.py 盘中刷新使用
     
-    return rsi
-
-def calculate_macd(prices, fast=12, slow=26, signal=9):
-    """计算MACD指标"""
-    if len(prices) < slow:
-        return {'dif': 0, 'dea': 0, 'macd': 0}
+    Returns:
+        (ETF数据列表, 失败列表 [{'code', 'name', 'error'}])
+    """
+    etfs = etfs or load_etf_universe()
+    print(f"正在获取 {len(etfs)} 只ETF数据...")
     
-    # 计算EMA
-    ema_fast = calculate_ema(prices, fast)
-    ema_slow = calculate_ema(prices, slow)
+    # 所有ETF的实时行情一次（或按批）获取
+    quotes = await fetch_etf_realtime_batch(
+        engine,
+        [etf['code'] for etf in etfs],
+        {etf['code']: etf['market'] for etf in etfs if etf.get('market')}
+    )
     
-    dif = ema_fast - ema_slow
+    store = store or KlineStore()
+    states = load_states()
+    semaphore = asyncio.Semaphore(ETF_PIPELINE_CONCURRENCY)
     
-    # 简化DEA计算
-    dea = dif * 0.8
-    macd = (dif - dea) * 2
+    async def run_pipeline(etf):
+        async with semaphore:
+            return await fetch_etf(engine, etf, quotes.get(etf['code']), store, states)
     
-    return {
-        'dif': round(dif, 4),
-        'dea': round(dea, 4),
-        'macd': round(macd, 4)
-    }
-
-def calculate_ema(prices, period):
-    """计算EMA"""
-    if len(prices) < period:
-        return prices[-1]
+    results = await asyncio.gather(*(run_pipeline(etf) for etf in etfs), return_exceptions=True)
+    save_states(states)
     
-    multiplier = 2 / (period + 1)
-    ema = sum(prices[:period]) / period
+    all_etf_data = []
+    failures = []
+    for etf, result in zip(etfs, results):
+        if isinstance(result, Exception):
+            failures.append({'code': etf['code'], 'name': etf['name'], 'error': str(result) or type(result).__name__})
+        else:
+            all_etf_data.append(result)
     
-    for price in prices[period:]:
-        ema = (price - ema) * multiplier + ema
+    if failures:
+        print(f"❌ {len(failures)} 只ETF获取失败:")
+        for failure in failures:
+            print(f"  {failure['name']}({failure['code']}): {failure['error']}")
     
-    return ema
+    return all_etf_data, failures
 
-def calculate_bollinger_bands(prices, period=20, std_dev=2):
-    """计算布林带"""
-    if len(prices) < period:
-        return {'upper': 0, 'middle': 0, 'lower': 0}
-    
-    recent_prices = prices[-period:]
-    middle = sum(recent_prices) / period
-    
-    variance = sum((p - middle) ** 2 for p in recent_prices) / period
-    std = variance ** 0.5
-    
-    upper = middle + (std_dev * std)
-    lower = middle - (std_dev * std)
-    
-    return {
-        'upper': round(upper, 3),
-        'middle': round(middle, 3),
-        'lower': round(lower, 3)
-    }
+def fetch_all_etf_data(etfs=None):
+    """获取所有ETF的数据，返回 (ETF数据列表, 失败列表)"""
+    return fetch_engine.run(lambda engine: fetch_all_etf_data_async(engine, etfs))
 
-def main():
-    print("=" * 60)
-    print("ETF数据爬取任务")
-    print(f"执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 60)
-    
-    # ETF配置
-    etfs = [
-        {'code': '159770', 'name': '机器人ETF', 'full_name': '国泰中证机器人ETF'},
-        {'code': '515860', 'name': '信创ETF', 'full_name': '华夏中证信创ETF'}
-    ]
-    
-    all_etf_data = []
-    
-    for etf in etfs:
-        print(f"正在获取 {etf['name']}({etf['code']}) 数据...")
-        
-        # 获取实时数据
-        realtime_data = fetch_etf_realtime_data(etf['code'])
-        if not realtime_data:
-            print(f"  ❌ 获取实时数据失败")
-            continue
-        
-        print(f"  ✓ 实时数据: 当前价 {realtime_data['current']}, 涨跌幅 {realtime_data['change_percent']}%")
-        
-        # 获取历史数据
-        time.sleep(1)  # 避免请求过快
-        historical_data = fetch_etf_historical_data(etf['code'], 30)
-        print(f"  ✓ 历史数据: {len(historical_data)} 条")
-        
-        # 计算技术指标
-        indicators = calculate_technical_indicators(historical_data)
-        print(f"  ✓ 技术指标: RSI={indicators.get('rsi', 0)}, MA5={indicators.get('ma5', 0)}")
-        
-        # 获取相关新闻
-        time.sleep(1)
-        news = fetch_etf_news(etf['name'], 10)
-        print(f"  ✓ 相关新闻: {len(news)} 条")
-        
-        # 汇总数据
-        etf_data = {
-            'code': etf['code'],
-            'name': etf['name'],
-            'full_name': etf['full_name'],
-            'realtime': realtime_data,
-            'historical': historical_data[-10:],  # 只保留最近10天
-            'indicators': indicators,
-            'news': news,
-            'updated_at': datetime.now().isoformat()
-        }
-        
-        all_etf_data.append(etf_data)
-    
-    # 保存数据
+def save_etf_data(all_etf_data, failures=None):
+    """保存ETF数据（fetch_all.py 也会调用）"""
     output_dir = 'data'
     os.makedirs(output_dir, exist_ok=True)
     
@@ -522,12 +570,25 @@ def main():
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump({
             'updated_at': datetime.now().isoformat(),
-            'etfs': all_etf_data
+            'etfs': all_etf_data,
+            'failures': failures or []
         }, f, ensure_ascii=False, indent=2)
     
     print(f"✅ 数据已保存到 {output_file}")
-    print(f"   共获取 {len(all_etf_data)} 只ETF数据")
+    print(f"   共获取 {len(all_etf_data)} 只ETF数据" + (f"，{len(failures)} 只失败" if failures else ''))
+    print("=" * 60)
+
+def main():
     print("=" * 60)
+    print("ETF数据爬取任务")
+    print(f"执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+    
+    all_etf_data, failures = fetch_all_etf_data()
+    
+    # 保存数据
+    save_etf_data(all_etf_data, failures)
+    http_client.print_connection_stats()
 
 if __name__ == '__main__':
     main()
@@ -1,15 +1,26 @@
-import requests
 import json
 import os
 from datetime import datetime, timedelta
-from typing import List, Dict
-import time
-from bs4 import BeautifulSoup
-import xml.etree.ElementTree as ET
+from typing import List, Dict, Optional
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import asyncio
+import fetch_engine
+from feed_cache import FeedCache
+from feed_parser import entry_id, fetch_feed, normalize_date
+from html_text import html_to_text
+import http_client
+from news_aggregates import save_aggregates
+from news_search import save_search_index
 
 # 新闻API配置（可选）
 NEWS_API_KEY = os.getenv('NEWS_API_KEY', '')
 
+# 订阅源条件请求缓存（ETag / Last-Modified 及上次解析的新闻）
+FEED_CACHE_FILE = 'data/feed_cache.json'
+
 # RSS订阅源列表（完全免费，无需API密钥）
 RSS_FEEDS = [
     {
@@ -34,7 +45,8 @@ RSS_FEEDS = [
     }
 ]
 
-def fetch_from_rss(feed_url: str, source: str, country: str) -> List[Dict]:
+async def fetch_from_rss(engine, feed_url: str, source: str, country: str,
+                         cache: Optional[FeedCache] = None) -> List[Dict]:
     """从RSS订阅源获取新闻"""
     news_list = []
     
@@ -42,37 +54,33 @@ def fetch_from_rss(feed_url: str, source: str, country: str) -> List[Dict]:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        response = requests.get(feed_url, headers=headers, timeout=10)
+        if cache:
+            headers.update(cache.conditional_headers(feed_url))
+        
+        response, entries = await fetch_feed(engine, feed_url, 10, headers=headers)
+        
+        # 源未更新，复用上次解析的结果
+        cached = cache.cached_items(feed_url, response) if cache else None
+        if cached is not None:
+            print(f"{source} 未更新，复用缓存的 {len(cached)} 条新闻")
+            return cached
         
         if response.status_code == 200:
-            # 解析RSS XML
-            root = ET.fromstring(response.content)
-            
-            # 查找所有item标签
-            items = root.findall('.//item')
-            
-            for item in items[:10]:  # 每个源取10条
+            for entry in entries:  # 每个源取10条
                 try:
-                    title = item.find('title').text if item.find('title') is not None else ''
-                    description = item.find('description').text if item.find('description') is not None else ''
-                    link = item.find('link').text if item.find('link') is not None else ''
-                    pub_date = item.find('pubDate').text if item.find('pubDate') is not None else ''
+                    title = entry['title']
+                    description = entry['description']
+                    link = entry['link']
+                    pub_date = entry['published']
                     
                     # 清理HTML标签
-                    if description:
-                        soup = BeautifulSoup(description, 'html.parser')
-                        description = soup.get_text().strip()
+                    description = html_to_text(description)
                     
                     # 转换日期格式
-                    try:
-                        if pub_date:
-                            pub_date_obj = datetime.strptime(pub_date, '%a, %d %b %Y %H:%M:%S %Z')
-                            pub_date = pub_date_obj.isoformat()
-                    except:
-                        pub_date = datetime.now().isoformat()
+                    pub_date = normalize_date(pub_date) or datetime.now().isoformat()
                     
                     news_item = {
-                        'id': hash(link),
+                        'id': entry_id(link),
                         'title': title,
                         'description': description[:300] if description else '',
                         'url': link,
@@ -89,6 +97,9 @@ def fetch_from_rss(feed_url: str, source: str, country: str) -> List[Dict]:
                     print(f"解析RSS项目时出错: {str(e)}")
                     continue
             
+            if cache:
+                cache.store(feed_url, response, news_list)
+            
             print(f"从 {source} 获取到 {len(news_list)} 条新闻")
             
     except Exception as e:
@@ -96,7 +107,7 @@ def fetch_from_rss(feed_url: str, source: str, country: str) -> List[Dict]:
     
     return news_list
 
-def fetch_from_google_news() -> List[Dict]:
+async def fetch_from_google_news(engine, cache: Optional[FeedCache] = None) -> List[Dict]:
     """从Google News爬取经济新闻"""
     news_list = []
     
@@ -108,34 +119,33 @@ def fetch_from_google_news() -> List[Dict]:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        if cache:
+            headers.update(cache.conditional_headers(url))
+        
+        response, entries = await fetch_feed(engine, url, 15, headers=headers)
+        
+        # 源未更新，复用上次解析的结果
+        cached = cache.cached_items(url, response) if cache else None
+        if cached is not None:
+            print(f"Google News 未更新，复用缓存的 {len(cached)} 条新闻")
+            return cached
         
         if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            items = root.findall('.//item')
-            
-            for item in items[:15]:  # 取15条
+            for entry in entries:  # 取15条
                 try:
-                    title = item.find('title').text if item.find('title') is not None else ''
-                    description = item.find('description').text if item.find('description') is not None else ''
-                    link = item.find('link').text if item.find('link') is not None else ''
-                    pub_date = item.find('pubDate').text if item.find('pubDate') is not None else ''
+                    title = entry['title']
+                    description = entry['description']
+                    link = entry['link']
+                    pub_date = entry['published']
                     
                     # 清理HTML
-                    if description:
-                        soup = BeautifulSoup(description, 'html.parser')
-                        description = soup.get_text().strip()
+                    description = html_to_text(description)
                     
                     # 转换日期
-                    try:
-                        if pub_date:
-                            pub_date_obj = datetime.strptime(pub_date, '%a, %d %b %Y %H:%M:%S %Z')
-                            pub_date = pub_date_obj.isoformat()
-                    except:
-                        pub_date = datetime.now().isoformat()
+                    pub_date = normalize_date(pub_date) or datetime.now().isoformat()
                     
                     news_item = {
-                        'id': hash(link),
+                        'id': entry_id(link),
                         'title': title,
                         'description': description[:300] if description else '',
                         'url': link,
@@ -152,6 +162,9 @@ def fetch_from_google_news() -> List[Dict]:
                     print(f"解析Google News项目时出错: {str(e)}")
                     continue
             
+            if cache:
+                cache.store(url, response, news_list)
+            
             print(f"从 Google News 获取到 {len(news_list)} 条新闻")
             
     except Exception as e:
@@ -159,7 +172,7 @@ def fetch_from_google_news() -> List[Dict]:
     
     return news_list
 
-def fetch_from_yahoo_finance() -> List[Dict]:
+async def fetch_from_yahoo_finance(engine, cache: Optional[FeedCache] = None) -> List[Dict]:
     """从Yahoo Finance爬取新闻"""
     news_list = []
     
@@ -171,32 +184,31 @@ def fetch_from_yahoo_finance() -> List[Dict]:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        if cache:
+            headers.update(cache.conditional_headers(url))
+        
+        response, entries = await fetch_feed(engine, url, 10, headers=headers)
+        
+        # 源未更新，复用上次解析的结果
+        cached = cache.cached_items(url, response) if cache else None
+        if cached is not None:
+            print(f"Yahoo Finance 未更新，复用缓存的 {len(cached)} 条新闻")
+            return cached
         
         if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            items = root.findall('.//item')
-            
-            for item in items[:10]:
+            for entry in entries:
                 try:
-                    title = item.find('title').text if item.find('title') is not None else ''
-                    description = item.find('description').text if item.find('description') is not None else ''
-                    link = item.find('link').text if item.find('link') is not None else ''
-                    pub_date = item.find('pubDate').text if item.find('pubDate') is not None else ''
+                    title = entry['title']
+                    description = entry['description']
+                    link = entry['link']
+                    pub_date = entry['published']
                     
-                    if description:
-                        soup = BeautifulSoup(description, 'html.parser')
-                        description = soup.get_text().strip()
+                    description = html_to_text(description)
                     
-                    try:
-                        if pub_date:
-                            pub_date_obj = datetime.strptime(pub_date, '%a, %d %b %Y %H:%M:%S %z')
-                            pub_date = pub_date_obj.isoformat()
-                    except:
-                        pub_date = datetime.now().isoformat()
+                    pub_date = normalize_date(pub_date) or datetime.now().isoformat()
                     
                     news_item = {
-                        'id': hash(link),
+                        'id': entry_id(link),
                         'title': title,
                         'description': description[:300] if description else '',
                         'url': link,
@@ -213,6 +225,9 @@ def fetch_from_yahoo_finance() -> List[Dict]:
                     print(f"解析Yahoo Finance项目时出错: {str(e)}")
                     continue
             
+            if cache:
+                cache.store(url, response, news_list)
+            
             print(f"从 Yahoo Finance 获取到 {len(news_list)} 条新闻")
             
     except Exception as e:
@@ -220,34 +235,35 @@ def fetch_from_yahoo_finance() -> List[Dict]:
     
     return news_list
 
-def fetch_economic_news() -> List[Dict]:
-    """从多个来源获取经济新闻"""
+async def fetch_economic_news_async(engine) -> List[Dict]:
+    """从多个来源获取经济新闻（在抓取引擎的事件循环中并发执行）"""
     print("开始获取经济新闻...")
     
-    all_news = []
+    cache = FeedCache(FEED_CACHE_FILE)
     
-    # 1. 从Google News获取
-    print("\n[1/3] 从 Google News 获取...")
-    google_news = fetch_from_google_news()
-    all_news.extend(google_news)
-    time.sleep(2)
+    # 新闻源列表: (名称, 协程)
+    sources = [
+        ('Google News', fetch_from_google_news(engine, cache)),
+        ('Yahoo Finance', fetch_from_yahoo_finance(engine, cache))
+    ]
+    for feed in RSS_FEEDS:
+        sources.append((feed['source'], fetch_from_rss(engine, feed['url'], feed['source'], feed['country'], cache)))
     
-    # 2. 从Yahoo Finance获取
-    print("\n[2/3] 从 Yahoo Finance 获取...")
-    yahoo_news = fetch_from_yahoo_finance()
-    all_news.extend(yahoo_news)
-    time.sleep(2)
+    # 并发获取，同一主机的请求间隔由抓取引擎控制
+    print(f"\n并发获取 {len(sources)} 个新闻源...")
+    results = await asyncio.gather(*(coro for name, coro in sources), return_exceptions=True)
     
-    # 3. 从RSS订阅源获取
-    print("\n[3/3] 从 RSS 订阅源获取...")
-    for feed in RSS_FEEDS:
-        try:
-            rss_news = fetch_from_rss(feed['url'], feed['source'], feed['country'])
-            all_news.extend(rss_news)
-            time.sleep(1)
-        except Exception as e:
-            print(f"RSS订阅源 {feed['source']} 失败: {str(e)}")
+    # 按新闻源顺序合并，保证去重结果稳定
+    all_news = []
+    for (name, coro), result in zip(sources, results):
+        if isinstance(result, Exception):
+            print(f"新闻源 {name} 失败: {str(result)}")
             continue
+        all_news.extend(result)
+    
+    cache.save()
+    if cache.hits:
+        print(f"{cache.hits} 个新闻源未更新，已复用缓存")
     
     # 去重（基于URL）
     seen_urls = set()
@@ -263,6 +279,10 @@ def fetch_economic_news() -> List[Dict]:
     print(f"\n总共获取 {len(unique_news)} 条去重后的新闻")
     return unique_news
 
+def fetch_economic_news() -> List[Dict]:
+    """从多个来源获取经济新闻"""
+    return fetch_engine.run(fetch_economic_news_async)
+
 def categorize_news(text: str) -> str:
     """根据文本内容分类新闻"""
     text_lower = text.lower()
@@ -413,10 +433,12 @@ def save_data(news_list: List[Dict], analysis: Dict):
     """保存数据到JSON文件"""
     os.makedirs('data', exist_ok=True)
     
+    updated_at = datetime.now().isoformat()
+    
     # 保存新闻数据
     with open('data/news.json', 'w', encoding='utf-8') as f:
         json.dump({
-            'updated_at': datetime.now().isoformat(),
+            'updated_at': updated_at,
             'total_count': len(news_list),
             'news': news_list
         }, f, ensure_ascii=False, indent=2)
@@ -425,6 +447,12 @@ def save_data(news_list: List[Dict], analysis: Dict):
     with open('data/analysis.json', 'w', encoding='utf-8') as f:
         json.dump(analysis, f, ensure_ascii=False, indent=2)
     
+    # 保存聚合统计（供API直接读取）
+    save_aggregates('data/news_aggregates.json', news_list, updated_at, analysis)
+    
+    # 保存全文检索索引
+    save_search_index('data/news_search_index.json', news_list, updated_at)
+    
     print("\n✅ 数据已保存到 data/ 目录")
 
 def main():
@@ -437,6 +465,11 @@ def main():
     # 获取新闻
     news_list = fetch_economic_news()
     
+    analyze_and_save(news_list)
+    http_client.print_connection_stats()
+
+def analyze_and_save(news_list: List[Dict]):
+    """分析并保存新闻（抓取完成后的步骤，fetch_all.py 也会调用）"""
     if not news_list:
         print("\n⚠️  未获取到新闻数据，使用模拟数据")
         news_list = generate_mock_news()
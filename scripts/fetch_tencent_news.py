@@ -1,11 +1,22 @@
-import requests
 import json
 import os
 from datetime import datetime, timedelta
-from typing import List, Dict
-import time
-from bs4 import BeautifulSoup
-import xml.etree.ElementTree as ET
+from typing import List, Dict, Optional
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import asyncio
+import fetch_engine
+from feed_cache import FeedCache
+from feed_parser import entry_id, fetch_feed, normalize_date
+from html_text import html_to_text
+import http_client
+from news_aggregates import save_aggregates
+from news_search import save_search_index
+
+# 订阅源条件请求缓存（ETag / Last-Modified 及上次解析的新闻）
+FEED_CACHE_FILE = 'data/tencent_feed_cache.json'
 
 # 腾讯相关关键词
 TENCENT_KEYWORDS = [
@@ -45,7 +56,7 @@ RSS_FEEDS = [
     }
 ]
 
-def fetch_from_google_news_tencent() -> List[Dict]:
+async def fetch_from_google_news_tencent(engine, cache: Optional[FeedCache] = None) -> List[Dict]:
     """从Google News获取腾讯相关新闻"""
     news_list = []
     
@@ -58,34 +69,33 @@ def fetch_from_google_news_tencent() -> List[Dict]:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        if cache:
+            headers.update(cache.conditional_headers(url))
+        
+        response, entries = await fetch_feed(engine, url, 15, headers=headers)
+        
+        # 源未更新，复用上次解析的结果
+        cached = cache.cached_items(url, response) if cache else None
+        if cached is not None:
+            print(f"Google News 未更新，复用缓存的 {len(cached)} 条相关新闻")
+            return cached
         
         if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            items = root.findall('.//item')
-            
-            for item in items[:15]:
+            for entry in entries:
                 try:
-                    title = item.find('title').text if item.find('title') is not None else ''
-                    description = item.find('description').text if item.find('description') is not None else ''
-                    link = item.find('link').text if item.find('link') is not None else ''
-                    pub_date = item.find('pubDate').text if item.find('pubDate') is not None else ''
+                    title = entry['title']
+                    description = entry['description']
+                    link = entry['link']
+                    pub_date = entry['published']
                     
                     # 清理HTML标签
-                    if description:
-                        soup = BeautifulSoup(description, 'html.parser')
-                        description = soup.get_text().strip()
+                    description = html_to_text(description)
                     
                     # 转换日期格式
-                    try:
-                        if pub_date:
-                            pub_date_obj = datetime.strptime(pub_date, '%a, %d %b %Y %H:%M:%S %Z')
-                            pub_date = pub_date_obj.isoformat()
-                    except:
-                        pub_date = datetime.now().isoformat()
+                    pub_date = normalize_date(pub_date) or datetime.now().isoformat()
                     
                     news_item = {
-                        'id': abs(hash(link)) % (10 ** 8),
+                        'id': entry_id(link) % (10 ** 8),
                         'title': title,
                         'description': description[:300] if description else '',
                         'url': link,
@@ -103,6 +113,9 @@ def fetch_from_google_news_tencent() -> List[Dict]:
                     print(f"解析Google News项目时出错: {str(e)}")
                     continue
             
+            if cache:
+                cache.store(url, response, news_list)
+            
             print(f"从 Google News 获取到 {len(news_list)} 条腾讯相关新闻")
             
     except Exception as e:
@@ -110,7 +123,8 @@ def fetch_from_google_news_tencent() -> List[Dict]:
     
     return news_list
 
-def fetch_from_rss(feed_url: str, source: str, country: str) -> List[Dict]:
+async def fetch_from_rss(engine, feed_url: str, source: str, country: str,
+                         cache: Optional[FeedCache] = None) -> List[Dict]:
     """从RSS订阅源获取新闻并筛选腾讯相关"""
     news_list = []
     
@@ -118,18 +132,24 @@ def fetch_from_rss(feed_url: str, source: str, country: str) -> List[Dict]:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        response = requests.get(feed_url, headers=headers, timeout=10)
+        if cache:
+            headers.update(cache.conditional_headers(feed_url))
+        
+        response, entries = await fetch_feed(engine, feed_url, 20, headers=headers)
+        
+        # 源未更新，复用上次解析的结果
+        cached = cache.cached_items(feed_url, response) if cache else None
+        if cached is not None:
+            print(f"{source} 未更新，复用缓存的 {len(cached)} 条相关新闻")
+            return cached
         
         if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            items = root.findall('.//item')
-            
-            for item in items[:20]:
+            for entry in entries:
                 try:
-                    title = item.find('title').text if item.find('title') is not None else ''
-                    description = item.find('description').text if item.find('description') is not None else ''
-                    link = item.find('link').text if item.find('link') is not None else ''
-                    pub_date = item.find('pubDate').text if item.find('pubDate') is not None else ''
+                    title = entry['title']
+                    description = entry['description']
+                    link = entry['link']
+                    pub_date = entry['published']
                     
                     # 计算相关性
                     text = title + ' ' + description
@@ -140,20 +160,13 @@ def fetch_from_rss(feed_url: str, source: str, country: str) -> List[Dict]:
                         continue
                     
                     # 清理HTML标签
-                    if description:
-                        soup = BeautifulSoup(description, 'html.parser')
-                        description = soup.get_text().strip()
+                    description = html_to_text(description)
                     
                     # 转换日期格式
-                    try:
-                        if pub_date:
-                            pub_date_obj = datetime.strptime(pub_date, '%a, %d %b %Y %H:%M:%S %Z')
-                            pub_date = pub_date_obj.isoformat()
-                    except:
-                        pub_date = datetime.now().isoformat()
+                    pub_date = normalize_date(pub_date) or datetime.now().isoformat()
                     
                     news_item = {
-                        'id': abs(hash(link)) % (10 ** 8),
+                        'id': entry_id(link) % (10 ** 8),
                         'title': title,
                         'description': description[:300] if description else '',
                         'url': link,
@@ -171,6 +184,9 @@ def fetch_from_rss(feed_url: str, source: str, country: str) -> List[Dict]:
                     print(f"解析RSS项目时出错: {str(e)}")
                     continue
             
+            if cache:
+                cache.store(feed_url, response, news_list)
+            
             print(f"从 {source} 获取到 {len(news_list)} 条相关新闻")
             
     except Exception as e:
@@ -233,28 +249,30 @@ def get_placeholder_image() -> str:
     import random
     return random.choice(images)
 
-def fetch_tencent_news() -> List[Dict]:
-    """从多个来源获取腾讯相关新闻"""
+async def fetch_tencent_news_async(engine) -> List[Dict]:
+    """从多个来源获取腾讯相关新闻（在抓取引擎的事件循环中并发执行）"""
     print("开始获取腾讯相关新闻...")
     
-    all_news = []
-    
-    # 1. 从Google News获取
-    print("\n[1/2] 从 Google News 获取腾讯新闻...")
-    google_news = fetch_from_google_news_tencent()
-    all_news.extend(google_news)
-    time.sleep(2)
+    cache = FeedCache(FEED_CACHE_FILE)
     
-    # 2. 从RSS订阅源获取
-    print("\n[2/2] 从 RSS 订阅源获取相关新闻...")
+    # 新闻源列表: (名称, 协程)，同一主机的请求间隔由抓取引擎控制
+    sources = [('Google News', fetch_from_google_news_tencent(engine, cache))]
     for feed in RSS_FEEDS:
-        try:
-            rss_news = fetch_from_rss(feed['url'], feed['source'], feed['country'])
-            all_news.extend(rss_news)
-            time.sleep(1)
-        except Exception as e:
-            print(f"RSS订阅源 {feed['source']} 失败: {str(e)}")
+        sources.append((feed['source'], fetch_from_rss(engine, feed['url'], feed['source'], feed['country'], cache)))
+    
+    print(f"\n并发获取 {len(sources)} 个新闻源...")
+    results = await asyncio.gather(*(coro for name, coro in sources), return_exceptions=True)
+    
+    all_news = []
+    for (name, coro), result in zip(sources, results):
+        if isinstance(result, Exception):
+            print(f"新闻源 {name} 失败: {str(result)}")
             continue
+        all_news.extend(result)
+    
+    cache.save()
+    if cache.hits:
+        print(f"{cache.hits} 个新闻源未更新，已复用缓存")
     
     # 去重（基于URL）
     seen_urls = set()
@@ -270,6 +288,10 @@ def fetch_tencent_news() -> List[Dict]:
     print(f"\n总共获取 {len(unique_news)} 条去重后的腾讯相关新闻")
     return unique_news
 
+def fetch_tencent_news() -> List[Dict]:
+    """从多个来源获取腾讯相关新闻"""
+    return fetch_engine.run(fetch_tencent_news_async)
+
 def analyze_tencent_investment(news_list: List[Dict]) -> Dict:
     """分析腾讯投资建议"""
     print("\n开始腾讯投资分析...")
@@ -393,7 +415,7 @@ def _ai_tencent_analysis(analyzer, news_list: List[Dict]) -> Dict:
             'max_tokens': 3000
         }
         
-        response = requests.post(
+        response = http_client.post(
             analyzer.config['api_url'],
             headers=headers,
             json=payload,
@@ -676,8 +698,9 @@ def save_data(news_list: List[Dict], analysis: Dict):
     os.makedirs('data', exist_ok=True)
     
     # 保存新闻数据
+    updated_at = datetime.now().isoformat()
     news_data = {
-        'updated_at': datetime.now().isoformat(),
+        'updated_at': updated_at,
         'total_count': len(news_list),
         'news': news_list
     }
@@ -692,6 +715,14 @@ def save_data(news_list: List[Dict], analysis: Dict):
         json.dump(analysis, f, ensure_ascii=False, indent=2)
     
     print(f"分析结果已保存到 data/tencent_analysis.json")
+    
+    # 保存聚合统计（供API直接读取）
+    save_aggregates('data/tencent_news_aggregates.json', news_list, updated_at, analysis)
+    print(f"聚合统计已保存到 data/tencent_news_aggregates.json")
+    
+    # 保存全文检索索引
+    save_search_index('data/tencent_news_search_index.json', news_list, updated_at)
+    print(f"检索索引已保存到 data/tencent_news_search_index.json")
 
 def main():
     """主函数"""
@@ -703,29 +734,34 @@ def main():
         # 获取新闻
         news_list = fetch_tencent_news()
         
-        if not news_list:
-            print("\n警告: 未能获取到任何新闻，使用模拟数据")
-            # 使用模拟数据
-            news_list = generate_mock_data()
-        
-        # AI分析
-        analysis = analyze_tencent_investment(news_list)
-        
-        # 保存数据
-        save_data(news_list, analysis)
-        
-        print("\n" + "=" * 60)
-        print("任务完成!")
-        print(f"- 获取新闻: {len(news_list)} 条")
-        print(f"- 投资温度: {analysis['temperature_score']}")
-        print(f"- 投资建议: {analysis['investment_advice']['recommendation']}")
-        print("=" * 60)
+        analyze_and_save(news_list)
+        http_client.print_connection_stats()
         
     except Exception as e:
         print(f"\n错误: {str(e)}")
         import traceback
         traceback.print_exc()
 
+def analyze_and_save(news_list: List[Dict]):
+    """分析并保存新闻（抓取完成后的步骤，fetch_all.py 也会调用）"""
+    if not news_list:
+        print("\n警告: 未能获取到任何新闻，使用模拟数据")
+        # 使用模拟数据
+        news_list = generate_mock_data()
+    
+    # AI分析
+    analysis = analyze_tencent_investment(news_list)
+    
+    # 保存数据
+    save_data(news_list, analysis)
+    
+    print("\n" + "=" * 60)
+    print("任务完成!")
+    print(f"- 获取新闻: {len(news_list)} 条")
+    print(f"- 投资温度: {analysis['temperature_score']}")
+    print(f"- 投资建议: {analysis['investment_advice']['recommendation']}")
+    print("=" * 60)
+
 def generate_mock_data():
     """生成模拟数据"""
     mock_news = [
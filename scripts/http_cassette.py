@@ -0,0 +1,183 @@
+"""
+HTTP录制/回放模块
+record 模式把所有对外请求的响应写入本地目录，replay 模式从目录中按请求返回
+录制的响应（可注入固定延迟），使抓取和分析流水线可以在离线环境中运行、分析和基准测试
+
+环境变量:
+    HTTP_CASSETTE_MODE: record / replay，未设置时不启用
+    HTTP_CASSETTE_DIR: 录制目录，默认 cassettes
+    HTTP_CASSETTE_LATENCY: 回放时每个请求注入的延迟（秒），默认 0
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODES = ('record', 'replay')
+
+DEFAULT_CASSETTE_DIR = 'cassettes'
+
+# 不录制的响应头（正文保存的是解压后的内容）
+SKIPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'set-cookie'}
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """回放时没有找到录制的响应（不会被重试）"""
+
+
+def cassette_settings() -> Optional[Dict]:
+    """
+    从环境变量读取录制/回放配置
+    
+    Returns:
+        {'mode', 'directory', 'latency'}，未启用时返回None
+    """
+    mode = os.getenv('HTTP_CASSETTE_MODE', '').strip().lower()
+    if not mode:
+        return None
+    if mode not in MODES:
+        raise ValueError(f"HTTP_CASSETTE_MODE 只能是 {' / '.join(MODES)}，当前为 {mode}")
+    
+    return {
+        'mode': mode,
+        'directory': os.getenv('HTTP_CASSETTE_DIR', DEFAULT_CASSETTE_DIR),
+        'latency': float(os.getenv('HTTP_CASSETTE_LATENCY', '0') or 0)
+    }
+
+
+def is_replaying() -> bool:
+    """当前是否处于回放模式"""
+    settings = cassette_settings()
+    return bool(settings) and settings['mode'] == 'replay'
+
+
+def _body_digest(body) -> str:
+    if body is None:
+        return ''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.sha1(body).hexdigest()[:16]
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    录制/回放适配器
+    
+    每个 (方法, URL) 对应一个JSON文件，文件中按请求体摘要保存多次交互；
+    回放时优先匹配请求体相同的交互，找不到时使用该URL最近录制的一次。
+    """
+    
+    def __init__(self, mode: str, directory: str, latency: float = 0.0,
+                 adapter: Optional[BaseAdapter] = None):
+        """
+        Args:
+            mode: record 或 replay
+            directory: 录制目录
+            latency: 回放时每个请求注入的延迟（秒）
+            adapter: record 模式下实际发送请求的适配器
+        """
+        super().__init__()
+        self.mode = mode
+        self.directory = directory
+        self.latency = latency
+        self.adapter = adapter
+        self._lock = threading.Lock()
+    
+    def _path(self, method: str, url: str) -> str:
+        host = urlparse(url).hostname or 'unknown'
+        digest = hashlib.sha1(f'{method} {url}'.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, host, f'{digest}.json')
+    
+    def _load(self, path: str) -> Dict:
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def send(self, request, **kwargs):
+        if self.mode == 'replay':
+            return self._replay(request)
+        return self._record(request, **kwargs)
+    
+    def _record(self, request, **kwargs):
+        response = self.adapter.send(request, **kwargs)
+        body = response.content
+        
+        interaction = {
+            'body_digest': _body_digest(request.body),
+            'recorded_at': datetime.now().isoformat(),
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {
+                key: value for key, value in response.headers.items()
+                if key.lower() not in SKIPPED_HEADERS
+            },
+            'body': base64.b64encode(body).decode('ascii')
+        }
+        
+        path = self._path(request.method, request.url)
+        with self._lock:
+            cassette = self._load(path)
+            interactions = [
+                item for item in cassette.get('interactions', [])
+                if item['body_digest'] != interaction['body_digest']
+            ]
+            interactions.append(interaction)
+            
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'method': request.method,
+                    'url': request.url,
+                    'interactions': interactions
+                }, f, ensure_ascii=False, indent=2)
+        
+        return response
+    
+    def _replay(self, request):
+        path = self._path(request.method, request.url)
+        with self._lock:
+            interactions = self._load(path).get('interactions', [])
+        
+        if not interactions:
+            raise CassetteMissError(
+                f'没有录制的响应: {request.method} {request.url}', request=request
+            )
+        
+        digest = _body_digest(request.body)
+        interaction = next(
+            (item for item in interactions if item['body_digest'] == digest),
+            interactions[-1]
+        )
+        
+        if self.latency > 0:
+            time.sleep(self.latency)
+        
+        body = base64.b64decode(interaction['body'])
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction.get('reason', '')
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        return response
+    
+    def close(self):
+        if self.adapter is not None:
+            self.adapter.close()
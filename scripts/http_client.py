@@ -0,0 +1,193 @@
+"""
+共享HTTP客户端
+所有对外请求复用同一个 requests.Session：按主机的连接池（keep-alive）、
+urllib3 Retry 按状态码退避重试、默认请求头，并统计连接复用情况
+"""
+
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from http_cassette import CassetteAdapter, cassette_settings
+
+# 默认请求头
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate'
+}
+
+# 默认超时（秒）
+DEFAULT_TIMEOUT = 10
+
+# 连接池：最多缓存的主机数、每个主机保持的连接数
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 8
+
+# 按状态码重试
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# POST 只在服务端明确未处理请求时重试（避免重复调用AI接口）
+POST_RETRY_STATUSES = (429, 503)
+
+_session = None
+_session_lock = threading.Lock()
+
+# 连接统计: {主机: {'requests': 请求数, 'connections': 建立的TCP/TLS连接数}}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(host: str, field: str):
+    with _stats_lock:
+        stats = _stats.setdefault(host, {'requests': 0, 'connections': 0})
+        stats[field] += 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        super().connect()
+        _record(self.host, 'connections')
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        super().connect()
+        _record(self.host, 'connections')
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """按主机维护连接池的适配器，记录每个主机的请求数和实际建立的连接数"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+    
+    def send(self, request, **kwargs):
+        _record(urlparse(request.url).hostname, 'requests')
+        return super().send(request, **kwargs)
+
+
+class OutboundRetry(Retry):
+    """幂等请求按 RETRY_STATUSES 重试，POST 只按 POST_RETRY_STATUSES 重试"""
+    
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method and method.upper() == 'POST':
+            return bool(self.total) and status_code in POST_RETRY_STATUSES
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def create_session(retries: int = RETRY_TOTAL, backoff_factor: float = RETRY_BACKOFF_FACTOR,
+                   pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                   headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    创建带连接池和重试策略的 Session
+    
+    Args:
+        retries: 最大重试次数，0 表示不重试（由调用方自行重试）
+        backoff_factor: 重试退避系数（第n次重试前等待 backoff_factor * 2^(n-1) 秒）
+        pool_connections: 连接池缓存的主机数
+        pool_maxsize: 每个主机保持的最大连接数
+        headers: 额外的默认请求头
+    """
+    if retries:
+        retry = OutboundRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=False,
+            respect_retry_after_header=True
+        )
+    else:
+        retry = Retry(0, read=False)
+    
+    adapter = PooledAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    
+    # 设置了 HTTP_CASSETTE_MODE 时录制或回放所有响应
+    settings = cassette_settings()
+    if settings:
+        adapter = CassetteAdapter(settings['mode'], settings['directory'], settings['latency'], adapter)
+    
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.headers.update(headers or {})
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """获取进程内共享的 Session（首次调用时创建）"""
+    global _session
+    
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """用共享 Session 发送GET请求"""
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    return get_session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """用共享 Session 发送POST请求"""
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    return get_session().post(url, **kwargs)
+
+
+def connection_stats() -> Dict:
+    """
+    统计所有 Session 的连接复用情况
+    
+    Returns:
+        {'requests': 请求数, 'connections': 新建连接数, 'reused': 复用连接的请求数,
+         'hosts': {主机: {'requests', 'connections', 'reused'}}}
+    """
+    with _stats_lock:
+        hosts = {host: dict(stats) for host, stats in _stats.items()}
+    
+    for stats in hosts.values():
+        stats['reused'] = max(0, stats['requests'] - stats['connections'])
+    
+    total_requests = sum(stats['requests'] for stats in hosts.values())
+    total_connections = sum(stats['connections'] for stats in hosts.values())
+    return {
+        'requests': total_requests,
+        'connections': total_connections,
+        'reused': max(0, total_requests - total_connections),
+        'hosts': hosts
+    }
+
+
+def print_connection_stats():
+    """打印连接复用统计"""
+    stats = connection_stats()
+    if not stats['requests']:
+        return
+    
+    print(f"\n🔌 HTTP连接: {stats['requests']} 次请求, 新建 {stats['connections']} 个连接, "
+          f"复用 {stats['reused']} 次")
+    for host, host_stats in sorted(stats['hosts'].items()):
+        print(f"   {host}: {host_stats['requests']} 次请求 / {host_stats['connections']} 个连接")
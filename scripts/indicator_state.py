@@ -0,0 +1,412 @@
+"""
+增量技术指标状态
+每只ETF保存 EMA、RSI、MACD（DIF/DEA/柱状值）和滚动均值/方差（Welford）的递推状态，
+新增一根日K线或收到一个实时报价时只做常数次运算，不再从完整价格序列重新计算；
+状态可序列化为JSON，盘中刷新时直接从文件恢复
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import json
+import math
+import os
+
+INDICATOR_STATE_FILE = 'data/indicator_state.json'
+
+MA_PERIODS = (5, 10, 20)
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BOLLINGER_PERIOD = 20
+BOLLINGER_STD = 2
+
+# 输出指标所需的最少K线数（与 indicators.MIN_HISTORY 一致）
+MIN_HISTORY = 20
+
+# 收盘价差异超过该值时认为历史价格被重新复权，需要重建状态
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+class EmaState:
+    """指数移动平均：前 period 个值取简单平均作为初值，之后递推"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value = None
+        self.seed_sum = 0.0
+        self.seed_count = 0
+
+    def _next(self, x: float) -> Tuple[Optional[float], float, int]:
+        if self.value is not None:
+            return (x - self.value) * self.alpha + self.value, self.seed_sum, self.seed_count
+        seed_sum, seed_count = self.seed_sum + x, self.seed_count + 1
+        value = seed_sum / self.period if seed_count == self.period else None
+        return value, seed_sum, seed_count
+
+    def update(self, x: float) -> Optional[float]:
+        """加入一个值，返回新的EMA（初值未满时为None）"""
+        self.value, self.seed_sum, self.seed_count = self._next(x)
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        """返回加入 x 后的EMA，不改变状态"""
+        return self._next(x)[0]
+
+    def to_dict(self) -> Dict:
+        return {'period': self.period, 'value': self.value, 'seed_sum': self.seed_sum, 'seed_count': self.seed_count}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EmaState':
+        state = cls(data['period'])
+        state.value = data['value']
+        state.seed_sum = data['seed_sum']
+        state.seed_count = data['seed_count']
+        return state
+
+
+class RollingStats:
+    """
+    固定窗口的滚动均值和总体方差（Welford 递推）
+
+    窗口未满时逐个加入；窗口已满时用新值替换最旧的值，均值和平方差和都是常数时间更新。
+    """
+
+    def __init__(self, window: int, values: Optional[List[float]] = None):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.mean = 0.0
+        self.m2 = 0.0
+        for value in values or []:
+            self.update(value)
+
+    def _next(self, x: float) -> Tuple[float, float]:
+        count = len(self.values)
+        if count < self.window:
+            delta = x - self.mean
+            mean = self.mean + delta / (count + 1)
+            return mean, self.m2 + delta * (x - mean)
+
+        oldest = self.values[0]
+        mean = self.mean + (x - oldest) / count
+        return mean, self.m2 + (x - oldest) * (x - mean + oldest - self.mean)
+
+    def update(self, x: float):
+        """加入一个值（窗口已满时移除最旧的值）"""
+        self.mean, self.m2 = self._next(x)
+        self.values.append(x)
+
+    def peek(self, x: float) -> Tuple[Optional[float], Optional[float]]:
+        """返回加入 x 后的 (均值, 标准差)，窗口未满时为 (None, None)，不改变状态"""
+        if len(self.values) + 1 < self.window:
+            return None, None
+        mean, m2 = self._next(x)
+        return mean, math.sqrt(max(m2, 0.0) / self.window)
+
+    def current(self) -> Tuple[Optional[float], Optional[float]]:
+        """当前窗口的 (均值, 标准差)，窗口未满时为 (None, None)"""
+        if len(self.values) < self.window:
+            return None, None
+        return self.mean, math.sqrt(max(self.m2, 0.0) / self.window)
+
+    def to_dict(self) -> Dict:
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RollingStats':
+        # 从窗口内的原始值重新累加，消除长期递推的浮点误差
+        return cls(data['window'], data['values'])
+
+
+class RsiState:
+    """
+    RSI：最近 period 个涨跌幅中涨幅均值与跌幅均值之比（简单平均）
+
+    与 indicators.rsi 的定义相同（etf_data.json 和策略阈值都基于这个定义），
+    只保存最近 period 个涨幅和跌幅，每次更新求和 period 个数，仍是常数时间。
+    """
+
+    def __init__(self, period: int = RSI_PERIOD):
+        self.period = period
+        self.prev_close = None
+        self.gains = deque(maxlen=period)
+        self.losses = deque(maxlen=period)
+
+    def _rsi(self, gains, losses) -> Optional[float]:
+        if len(gains) < self.period:
+            return None
+        avg_loss = sum(losses) / self.period
+        if avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + sum(gains) / self.period / avg_loss)
+
+    def update(self, close: float) -> Optional[float]:
+        """加入一个收盘价，返回新的RSI（数据不足时为None）"""
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            self.gains.append(max(change, 0.0))
+            self.losses.append(max(-change, 0.0))
+        self.prev_close = close
+        return self.value
+
+    def peek(self, close: float) -> Optional[float]:
+        """返回以 close 收盘时的RSI，不改变状态"""
+        if self.prev_close is None:
+            return None
+        change = close - self.prev_close
+        return self._rsi(self._window(self.gains, max(change, 0.0)), self._window(self.losses, max(-change, 0.0)))
+
+    def _window(self, values: deque, x: float) -> List[float]:
+        """加入 x 后的窗口（不修改原窗口）"""
+        return list(values)[max(len(values) + 1 - self.period, 0):] + [x]
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._rsi(self.gains, self.losses)
+
+    def to_dict(self) -> Dict:
+        return {'period': self.period, 'prev_close': self.prev_close,
+                'gains': list(self.gains), 'losses': list(self.losses)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RsiState':
+        state = cls(data['period'])
+        state.prev_close = data['prev_close']
+        state.gains.extend(data['gains'])
+        state.losses.extend(data['losses'])
+        return state
+
+
+class MacdState:
+    """
+    MACD：DIF = EMA(fast) - EMA(slow)，DEA = DIF 的 EMA(signal)，柱状值 = (DIF - DEA) * 2
+
+    同时记录 DIF 相对 DEA 的位置和最近一次交叉，判断交叉不需要回看历史
+    """
+
+    def __init__(self, fast: int = MACD_FAST, slow: int = MACD_SLOW, signal: int = MACD_SIGNAL):
+        self.fast = EmaState(fast)
+        self.slow = EmaState(slow)
+        self.signal = EmaState(signal)
+        self.dif = None
+        self.bars = 0
+        self.side = None
+        self.cross_direction = None
+        self.cross_bar = None
+
+    @staticmethod
+    def _side(dif: Optional[float], dea: Optional[float]) -> Optional[int]:
+        if dif is None or dea is None:
+            return None
+        return (dif > dea) - (dif < dea)
+
+    def _cross(self, side: Optional[int]) -> Optional[str]:
+        """相对上一根K线的位置变化是否构成交叉"""
+        if side is None or self.side is None:
+            return None
+        if side > 0 >= self.side:
+            return 'golden'
+        if side < 0 <= self.side:
+            return 'death'
+        return None
+
+    def _result(self, dif: Optional[float], dea: Optional[float], bars: int,
+                cross_direction: Optional[str], cross_bar: Optional[int]) -> Dict:
+        macd = (dif - dea) * 2 if dif is not None and dea is not None else None
+        last_cross = None
+        if cross_direction is not None:
+            last_cross = {'direction': cross_direction, 'bars_ago': bars - 1 - cross_bar}
+        return {'dif': dif, 'dea': dea, 'macd': macd, 'last_cross': last_cross}
+
+    def update(self, close: float) -> Dict:
+        """加入一个收盘价，返回 {'dif', 'dea', 'macd', 'last_cross'}（数据不足的项为None）"""
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        dea = None
+        if fast is not None and slow is not None:
+            self.dif = fast - slow
+            dea = self.signal.update(self.dif)
+
+        side = self._side(self.dif, dea)
+        cross = self._cross(side)
+        if cross:
+            self.cross_direction, self.cross_bar = cross, self.bars
+        self.side = side if side is not None else self.side
+        self.bars += 1
+        return self.current()
+
+    def peek(self, close: float) -> Dict:
+        """返回以 close 收盘时的MACD，不改变状态"""
+        fast, slow = self.fast.peek(close), self.slow.peek(close)
+        if fast is None or slow is None:
+            return self._result(None, None, self.bars + 1, self.cross_direction, self.cross_bar)
+
+        dif = fast - slow
+        dea = self.signal.peek(dif)
+        cross = self._cross(self._side(dif, dea))
+        if cross:
+            return self._result(dif, dea, self.bars + 1, cross, self.bars)
+        return self._result(dif, dea, self.bars + 1, self.cross_direction, self.cross_bar)
+
+    def current(self) -> Dict:
+        return self._result(self.dif, self.signal.value, self.bars, self.cross_direction, self.cross_bar)
+
+    def to_dict(self) -> Dict:
+        return {'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(),
+                'signal': self.signal.to_dict(), 'dif': self.dif, 'bars': self.bars, 'side': self.side,
+                'cross_direction': self.cross_direction, 'cross_bar': self.cross_bar}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MacdState':
+        state = cls()
+        state.fast = EmaState.from_dict(data['fast'])
+        state.slow = EmaState.from_dict(data['slow'])
+        state.signal = EmaState.from_dict(data['signal'])
+        state.dif = data['dif']
+        state.bars = data['bars']
+        state.side = data['side']
+        state.cross_direction = data['cross_direction']
+        state.cross_bar = data['cross_bar']
+        return state
+
+
+class EtfIndicatorState:
+    """
+    单只ETF的全部指标状态
+
+    update() 提交一根已收盘的日K线；quote() 用盘中实时价格作为当天的临时收盘价计算指标，
+    不改变状态，同一天可以反复调用。
+    """
+
+    def __init__(self):
+        self.last_date = None
+        self.last_close = None
+        self.count = 0
+        self.ma = {period: RollingStats(period) for period in MA_PERIODS}
+        self.rsi = RsiState(RSI_PERIOD)
+        self.macd = MacdState()
+
+    @classmethod
+    def from_klines(cls, klines: List[Dict]) -> 'EtfIndicatorState':
+        """由按日期升序的K线构建状态"""
+        state = cls()
+        for kline in klines:
+            state.update(kline['date'], kline['close'])
+        return state
+
+    def update(self, date: str, close: float) -> bool:
+        """提交一根日K线，日期不晚于已提交的最后一天时忽略并返回False"""
+        if self.last_date is not None and date <= self.last_date:
+            return False
+
+        for stats in self.ma.values():
+            stats.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.last_date = date
+        self.last_close = close
+        self.count += 1
+        return True
+
+    def _indicators(self, count: int, ma: Dict[int, Tuple], rsi: Optional[float], macd: Dict) -> Dict:
+        """组装与 indicators.latest_indicators 相同结构的字典（不含成交量变化）"""
+        if count < MIN_HISTORY:
+            return {}
+
+        middle, std = ma[BOLLINGER_PERIOD]
+        return {
+            'ma5': round(ma[5][0], 3),
+            'ma10': round(ma[10][0], 3),
+            'ma20': round(ma[20][0], 3),
+            'rsi': round(50.0 if rsi is None else rsi, 2),
+            'macd': {
+                'dif': round(macd['dif'] or 0, 4),
+                'dea': round(macd['dea'] or 0, 4),
+                'macd': round(macd['macd'] or 0, 4),
+                'last_cross': macd['last_cross']
+            },
+            'bollinger': {
+                'upper': round(middle + BOLLINGER_STD * std, 3),
+                'middle': round(middle, 3),
+                'lower': round(middle - BOLLINGER_STD * std, 3)
+            }
+        }
+
+    def current(self) -> Dict:
+        """最后一根已提交K线的指标"""
+        ma = {period: stats.current() for period, stats in self.ma.items()}
+        return self._indicators(self.count, ma, self.rsi.value, self.macd.current())
+
+    def quote(self, price: float) -> Dict:
+        """以实时价格作为当天收盘价的指标（常数时间，不改变状态）"""
+        ma = {period: stats.peek(price) for period, stats in self.ma.items()}
+        return self._indicators(self.count + 1, ma, self.rsi.peek(price), self.macd.peek(price))
+
+    def to_dict(self) -> Dict:
+        return {
+            'last_date': self.last_date,
+            'last_close': self.last_close,
+            'count': self.count,
+            'ma': {str(period): stats.to_dict() for period, stats in self.ma.items()},
+            'rsi': self.rsi.to_dict(),
+            'macd': self.macd.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EtfIndicatorState':
+        state = cls()
+        state.last_date = data['last_date']
+        state.last_close = data['last_close']
+        state.count = data['count']
+        state.ma = {int(period): RollingStats.from_dict(stats) for period, stats in data['ma'].items()}
+        state.rsi = RsiState.from_dict(data['rsi'])
+        state.macd = MacdState.from_dict(data['macd'])
+        return state
+
+
+def sync_state(state: Optional[EtfIndicatorState], klines: List[Dict]) -> EtfIndicatorState:
+    """
+    把状态推进到K线的最后一天
+
+    从后往前找到状态的最后一天，只提交其后的K线；这一天不在K线中
+    或收盘价已变（历史价格被重新复权）时从全部K线重建。
+    """
+    if state is None or state.last_date is None:
+        return EtfIndicatorState.from_klines(klines)
+
+    index = len(klines) - 1
+    while index >= 0 and klines[index]['date'] > state.last_date:
+        index -= 1
+
+    if index < 0 or klines[index]['date'] != state.last_date \
+            or abs(klines[index]['close'] - state.last_close) > ADJUSTMENT_TOLERANCE:
+        return EtfIndicatorState.from_klines(klines)
+
+    for kline in klines[index + 1:]:
+        state.update(kline['date'], kline['close'])
+    return state
+
+
+def load_states(filepath: str = INDICATOR_STATE_FILE) -> Dict[str, EtfIndicatorState]:
+    """读取所有ETF的指标状态 {代码: 状态}，文件不存在或损坏时返回空字典"""
+    if not os.path.exists(filepath):
+        return {}
+
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {code: EtfIndicatorState.from_dict(item) for code, item in data.get('states', {}).items()}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠️  指标状态读取失败，将从K线重建: {str(e)}")
+        return {}
+
+
+def save_states(states: Dict[str, EtfIndicatorState], filepath: str = INDICATOR_STATE_FILE):
+    """写入所有ETF的指标状态"""
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump({
+            'updated_at': datetime.now().isoformat(),
+            'states': {code: state.to_dict() for code, state in states.items()}
+        }, f, ensure_ascii=False)
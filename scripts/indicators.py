@@ -0,0 +1,268 @@
+"""
+技术指标计算模块（NumPy）
+输入K线的 OHLCV 数组（单只ETF的一维数组或多只ETF的二维数组），一次计算出与K线逐日对齐的完整指标序列：
+均线用累计和，布林带用滑动窗口标准差，EMA 用递推滤波，MACD 的 DEA 是 DIF 序列的 EMA；
+latest_indicators() 取最后一天，输出与原 calculate_technical_indicators 相同的字典
+"""
+
+from itertools import chain
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+MA_PERIODS = (5, 10, 20)
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BOLLINGER_PERIOD = 20
+BOLLINGER_STD = 2
+
+# 计算指标所需的最少K线数
+MIN_HISTORY = 20
+
+# MACD 的 DEA 第一次有值所需的K线数
+MACD_MIN_HISTORY = MACD_SLOW + MACD_SIGNAL - 1
+
+# 交叉方向
+GOLDEN_CROSS = 1
+DEATH_CROSS = -1
+
+OHLCV_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'amount')
+
+# EMA 分块递推的块长：块内用闭式解向量化计算，衰减因子的幂在块内不会溢出
+EMA_BLOCK = 256
+
+
+def klines_to_arrays(klines: List[Dict]) -> Dict[str, np.ndarray]:
+    """把K线字典列表转为按字段的数组 {'date', 'open', 'high', 'low', 'close', 'volume', 'amount'}"""
+    rows = map(itemgetter(*OHLCV_FIELDS), klines)
+    values = np.fromiter(chain.from_iterable(rows), dtype=float,
+                         count=len(klines) * len(OHLCV_FIELDS)).reshape(-1, len(OHLCV_FIELDS))
+    arrays = {'date': np.array([kline['date'] for kline in klines])}
+    for i, field in enumerate(OHLCV_FIELDS):
+        arrays[field] = values[:, i]
+    return arrays
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """简单移动平均（累计和相减），沿最后一维计算，前 window-1 个位置为 NaN"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        zeros = np.zeros(values.shape[:-1] + (1,))
+        cumsum = np.cumsum(np.concatenate((zeros, values), axis=-1), axis=-1)
+        out[..., window - 1:] = (cumsum[..., window:] - cumsum[..., :-window]) / window
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    滑动窗口总体标准差（ddof=0），沿最后一维计算，前 window-1 个位置为 NaN
+
+    用累计和与平方累计和计算；先减去整体均值，避免价格水平较高时 E[x²] - E[x]² 的相消误差
+    """
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        centered = values - values.mean(axis=-1, keepdims=True)
+        mean = rolling_mean(centered, window)[..., window - 1:]
+        mean_sq = rolling_mean(centered * centered, window)[..., window - 1:]
+        out[..., window - 1:] = np.sqrt(np.maximum(mean_sq - mean * mean, 0))
+    return out
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    指数移动平均，沿最后一维计算，以前 period 个值的简单平均为初值，前 period-1 个位置为 NaN
+
+    递推 e[t] = e[t-1] + alpha * (x[t] - e[t-1]) 按 EMA_BLOCK 分块展开为
+    e[j] = decay^(j+1) * e[-1] + alpha * Σ decay^(j-k) * x[k]，块内用累计和一次算出
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    length = values.shape[-1]
+    if length < period:
+        return out
+
+    alpha = 2 / (period + 1)
+    decay = 1 - alpha
+    current = values[..., :period].mean(axis=-1)
+    out[..., period - 1] = current
+    if decay == 0:
+        out[..., period:] = values[..., period:]
+        return out
+
+    steps = np.arange(EMA_BLOCK)
+    growth = decay ** -steps
+    shrink = decay ** steps
+    for start in range(period, length, EMA_BLOCK):
+        block = values[..., start:start + EMA_BLOCK]
+        size = block.shape[-1]
+        weighted = np.cumsum(block * growth[:size], axis=-1) * shrink[:size]
+        out[..., start:start + size] = shrink[:size] * decay * current[..., None] + alpha * weighted
+        current = out[..., start + size - 1]
+    return out
+
+
+def rsi(close: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """
+    RSI：最近 period 天涨幅均值与跌幅均值之比，前 period 个位置为 NaN，只涨不跌时为100
+
+    均值是简单平均而不是 Wilder 平滑，与原有的RSI和策略阈值一致；
+    盘中增量计算的 indicator_state.RsiState 使用同一定义
+    """
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] < period + 1:
+        return out
+
+    changes = np.diff(close, axis=-1)
+    avg_gain = rolling_mean(np.clip(changes, 0, None), period)[..., period - 1:]
+    avg_loss = rolling_mean(np.clip(-changes, 0, None), period)[..., period - 1:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    out[..., period:] = np.where(avg_loss == 0, 100.0, values)
+    return out
+
+
+def macd(close: np.ndarray, fast: int = MACD_FAST, slow: int = MACD_SLOW,
+         signal: int = MACD_SIGNAL) -> Dict[str, np.ndarray]:
+    """
+    MACD：DIF = EMA(fast) - EMA(slow)，DEA = DIF 序列的 EMA(signal)，柱状值 = (DIF - DEA) * 2
+
+    DIF 从第 slow 根K线开始有值，DEA 从第 slow + signal - 1 根开始有值；
+    cross 为每根K线上的交叉事件（GOLDEN_CROSS / DEATH_CROSS / 0）
+    """
+    dif = ema(close, fast) - ema(close, slow)
+    dea = np.full(dif.shape, np.nan)
+    if dif.shape[-1] >= slow:
+        dea[..., slow - 1:] = ema(dif[..., slow - 1:], signal)
+    return {'dif': dif, 'dea': dea, 'macd': (dif - dea) * 2, 'cross': crossovers(dif, dea)}
+
+
+def crossovers(fast_line: np.ndarray, slow_line: np.ndarray) -> np.ndarray:
+    """
+    两条线的交叉事件，沿最后一维逐根K线标记
+
+    快线由不高于慢线变为高于慢线为 GOLDEN_CROSS，由不低于变为低于为 DEATH_CROSS，其余为0；
+    任一条线为 NaN 的位置不产生事件
+    """
+    with np.errstate(invalid='ignore'):
+        side = np.sign(fast_line - slow_line)
+    events = np.zeros(side.shape, dtype=np.int8)
+    previous, current = side[..., :-1], side[..., 1:]
+    with np.errstate(invalid='ignore'):
+        events[..., 1:][(current > 0) & (previous <= 0)] = GOLDEN_CROSS
+        events[..., 1:][(current < 0) & (previous >= 0)] = DEATH_CROSS
+    return events
+
+
+def cross_events(cross: np.ndarray) -> List[Dict]:
+    """把一维交叉序列转为事件列表 [{'index', 'direction': 'golden' / 'death'}]"""
+    return [
+        {'index': int(index), 'direction': 'golden' if cross[index] == GOLDEN_CROSS else 'death'}
+        for index in np.flatnonzero(cross)
+    ]
+
+
+def bollinger(close: np.ndarray, period: int = BOLLINGER_PERIOD,
+              std_dev: float = BOLLINGER_STD) -> Dict[str, np.ndarray]:
+    """布林带：中轨为 period 日均线，上下轨为中轨 ± std_dev 倍标准差"""
+    middle = rolling_mean(close, period)
+    std = rolling_std(close, period)
+    return {'upper': middle + std_dev * std, 'middle': middle, 'lower': middle - std_dev * std}
+
+
+def volume_change(volume: np.ndarray) -> np.ndarray:
+    """成交量较前一日的变化百分比，前一日成交量为0时为0，第一个位置为 NaN"""
+    out = np.full(volume.shape, np.nan)
+    if volume.shape[-1] >= 2:
+        previous = volume[..., :-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[..., 1:] = np.where(previous > 0, (volume[..., 1:] - previous) / previous * 100, 0.0)
+    return out
+
+
+def compute_series(close: Sequence[float], volume: Optional[Sequence[float]] = None) -> Dict[str, np.ndarray]:
+    """
+    计算全部指标序列
+
+    所有函数都沿最后一维（日期）计算，也可以传入 (ETF数, 天数) 的二维数组一次算出多只ETF
+
+    Args:
+        close: 收盘价序列（按日期升序）
+        volume: 成交量序列，省略时不计算成交量变化
+
+    Returns:
+        与输入逐日对齐的数组：close、ma5/ma10/ma20、rsi、dif/dea/macd/cross、
+        boll_upper/boll_middle/boll_lower、volume_change；数据不足的位置为 NaN
+    """
+    close = np.asarray(close, dtype=float)
+    series = {'close': close}
+
+    for period in MA_PERIODS:
+        series[f'ma{period}'] = rolling_mean(close, period)
+
+    series['rsi'] = rsi(close)
+    series.update(macd(close))
+    for key, values in bollinger(close).items():
+        series[f'boll_{key}'] = values
+
+    if volume is not None:
+        series['volume_change'] = volume_change(np.asarray(volume, dtype=float))
+    return series
+
+
+def _last(values: np.ndarray, default: float = 0.0) -> float:
+    value = float(values[-1]) if values.shape[-1] else np.nan
+    return default if np.isnan(value) else value
+
+
+def _last_cross(cross: np.ndarray) -> Optional[Dict]:
+    """最近一次交叉：{'direction': 'golden' / 'death', 'bars_ago': 距最后一根K线的根数}，没有交叉时为None"""
+    indexes = np.flatnonzero(cross)
+    if not len(indexes):
+        return None
+    index = int(indexes[-1])
+    return {
+        'direction': 'golden' if cross[index] == GOLDEN_CROSS else 'death',
+        'bars_ago': len(cross) - 1 - index
+    }
+
+
+def latest_indicators(series: Dict[str, np.ndarray]) -> Dict:
+    """
+    取指标序列的最后一天，输出 etf_data.json 使用的字典
+
+    少于 MIN_HISTORY 天时返回空字典；RSI 数据不足时为50，MACD 数据不足时为0。
+    macd.last_cross 为最近一次 DIF/DEA 交叉。
+    """
+    if series['close'].shape[-1] < MIN_HISTORY:
+        return {}
+
+    return {
+        'ma5': round(_last(series['ma5']), 3),
+        'ma10': round(_last(series['ma10']), 3),
+        'ma20': round(_last(series['ma20']), 3),
+        'rsi': round(_last(series['rsi'], 50.0), 2),
+        'macd': {
+            'dif': round(_last(series['dif']), 4),
+            'dea': round(_last(series['dea']), 4),
+            'macd': round(_last(series['macd']), 4),
+            'last_cross': _last_cross(series['cross'])
+        },
+        'bollinger': {
+            'upper': round(_last(series['boll_upper']), 3),
+            'middle': round(_last(series['boll_middle']), 3),
+            'lower': round(_last(series['boll_lower']), 3)
+        },
+        'volume_change': round(_last(series.get('volume_change', np.array([]))), 2)
+    }
+
+
+def calculate_technical_indicators(klines: List[Dict]) -> Dict:
+    """由K线字典列表计算最后一天的技术指标字典"""
+    if not klines or len(klines) < MIN_HISTORY:
+        return {}
+
+    arrays = klines_to_arrays(klines)
+    return latest_indicators(compute_series(arrays['close'], arrays['volume']))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+盘中指标刷新脚本
+按固定间隔批量获取ETF实时行情，用增量指标状态（data/indicator_state.json）
+以实时价格作为当天收盘价计算指标，每个报价只需常数时间
+
+用法:
+    python scripts/intraday_indicators.py                      # 每5秒刷新一次，直到中断
+    python scripts/intraday_indicators.py --interval 10 --rounds 3 --output data/etf_intraday.json
+"""
+
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import fetch_engine
+from fetch_etf_data import fetch_etf_realtime_batch, load_etf_universe
+from indicator_state import EtfIndicatorState, load_states
+from kline_store import KlineStore, settled_klines
+
+
+def prepare_states(etfs):
+    """读取保存的指标状态，缺少的ETF从本地K线存储重建"""
+    states = load_states()
+    store = KlineStore()
+    for etf in etfs:
+        if etf['code'] not in states:
+            states[etf['code']] = EtfIndicatorState.from_klines(settled_klines(store.load(etf['code'])))
+    return states
+
+
+def refresh(etfs, states, quotes):
+    """
+    用一轮实时行情计算所有ETF的指标，返回 [{'code', 'name', 'realtime', 'indicators'}]
+
+    开盘前和休市日行情接口返回的是上一交易日的收盘价，这根K线已经提交到状态中，
+    报价日期不晚于状态的最后一天时直接使用已提交K线的指标，避免重复计入
+    """
+    results = []
+    for etf in etfs:
+        quote = quotes.get(etf['code'])
+        if not quote or not quote['current']:
+            continue
+        state = states[etf['code']]
+        if state.last_date is not None and quote.get('date') and quote['date'] <= state.last_date:
+            indicators = state.current()
+        else:
+            indicators = state.quote(quote['current'])
+        results.append({
+            'code': etf['code'],
+            'name': etf['name'],
+            'realtime': quote,
+            'indicators': indicators
+        })
+    return results
+
+
+def print_round(results):
+    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] {len(results)} 只ETF")
+    for item in results:
+        indicators = item['indicators']
+        macd = indicators.get('macd', {})
+        print(f"  {item['name']}({item['code']}): {item['realtime']['current']} "
+              f"({item['realtime']['change_percent']}%)  RSI={indicators.get('rsi', '-')}  "
+              f"MA5={indicators.get('ma5', '-')}  DIF={macd.get('dif', '-')} DEA={macd.get('dea', '-')}")
+
+
+async def run_loop(engine, etfs, states, interval, rounds, output):
+    codes = [etf['code'] for etf in etfs]
+    markets = {etf['code']: etf['market'] for etf in etfs}
+
+    count = 0
+    while not rounds or count < rounds:
+        quotes = await fetch_etf_realtime_batch(engine, codes, markets)
+        results = refresh(etfs, states, quotes)
+        print_round(results)
+
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump({'updated_at': datetime.now().isoformat(), 'etfs': results}, f, ensure_ascii=False, indent=2)
+
+        count += 1
+        if not rounds or count < rounds:
+            await asyncio.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='盘中按实时行情增量刷新ETF技术指标')
+    parser.add_argument('--interval', type=float, default=5.0, help='刷新间隔（秒）')
+    parser.add_argument('--rounds', type=int, default=0, help='刷新次数，0 表示直到中断')
+    parser.add_argument('--output', help='每轮结果写入的JSON文件')
+    args = parser.parse_args()
+
+    etfs = load_etf_universe()
+    states = prepare_states(etfs)
+
+    try:
+        fetch_engine.run(lambda engine: run_loop(engine, etfs, states, args.interval, args.rounds, args.output))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
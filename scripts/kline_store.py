@@ -0,0 +1,106 @@
+"""
+本地K线存储
+每只ETF的日K线保存为 data/klines/<代码>.csv（按日期升序），记录已存储的最后日期，
+每次运行只向东方财富请求缺失的交易日；前复权价格因分红等事件整体调整时重新下载全部历史
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+import csv
+import os
+
+DEFAULT_KLINE_DIR = 'data/klines'
+
+# CSV列（与 fetch_etf_historical_data 返回的字段一致）
+KLINE_FIELDS = ['date', 'open', 'close', 'high', 'low', 'volume', 'amount', 'change_percent']
+
+# 收盘价差异超过该值时认为历史价格被重新复权
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+def _parse_row(row: Dict[str, str]) -> Dict:
+    return {
+        'date': row['date'],
+        'open': float(row['open']),
+        'close': float(row['close']),
+        'high': float(row['high']),
+        'low': float(row['low']),
+        'volume': int(row['volume']),
+        'amount': float(row['amount']),
+        'change_percent': float(row['change_percent'])
+    }
+
+
+class KlineStore:
+    """按代码保存日K线的CSV文件目录"""
+
+    def __init__(self, directory: str = DEFAULT_KLINE_DIR):
+        """
+        Args:
+            directory: 存储目录，每只ETF一个CSV文件
+        """
+        self.directory = directory
+
+    def path(self, code: str) -> str:
+        return os.path.join(self.directory, f'{code}.csv')
+
+    def load(self, code: str) -> List[Dict]:
+        """读取一只ETF的全部K线（按日期升序），文件不存在或损坏时返回空列表"""
+        path = self.path(code)
+        if not os.path.exists(path):
+            return []
+
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                return [_parse_row(row) for row in csv.DictReader(f)]
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️  {code} 的本地K线读取失败，将重新下载: {str(e)}")
+            return []
+
+    def save(self, code: str, rows: List[Dict]):
+        """写入一只ETF的全部K线（先写临时文件再替换，避免中断时留下半个文件）"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(code)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=KLINE_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, path)
+
+
+def needs_full_reload(stored: List[Dict], fetched: List[Dict]) -> bool:
+    """
+    判断增量数据能否接在已存储的K线之后
+
+    增量请求从已存储的最后一天开始，这一天应出现在返回结果中且收盘价不变；
+    否则说明历史价格被重新复权（或数据不连续），需要重新下载全部历史。
+    """
+    if not stored:
+        return True
+
+    last = stored[-1]
+    overlap = next((row for row in fetched if row['date'] == last['date']), None)
+    if overlap is None:
+        return True
+    return abs(overlap['close'] - last['close']) > ADJUSTMENT_TOLERANCE
+
+
+def merge_klines(stored: List[Dict], fetched: List[Dict]) -> List[Dict]:
+    """把增量K线合并到已存储的K线后面（同一天以新数据为准）"""
+    rows = {row['date']: row for row in stored}
+    rows.update((row['date'], row) for row in fetched)
+    return [rows[date] for date in sorted(rows)]
+
+
+def next_fetch_start(stored: List[Dict]) -> Optional[str]:
+    """增量请求的起始日期（YYYYMMDD，包含已存储的最后一天用于校验复权）；没有存储时返回None"""
+    if not stored:
+        return None
+    return stored[-1]['date'].replace('-', '')
+
+
+def settled_klines(klines: List[Dict], today: Optional[str] = None) -> List[Dict]:
+    """去掉当天（可能未收盘）的K线，只保留已收盘的交易日"""
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    return [row for row in klines if row['date'] < today]
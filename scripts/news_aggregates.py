@@ -0,0 +1,137 @@
+"""
+新闻聚合统计模块
+在爬取脚本保存数据时预先计算分类、日期、来源统计，供API直接读取
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import List, Dict, Optional
+import json
+import os
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """
+    将ISO格式时间解析为epoch秒
+    
+    不带时区的时间按UTC处理，保证爬取脚本与API得到相同的结果；无法解析时返回None。
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _count_by(news_list: List[Dict], key: str, default: str) -> Dict[str, int]:
+    """按字段统计新闻数量"""
+    counts = {}
+    for news in news_list:
+        value = news.get(key, default)
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+def _count_by_day(news_list: List[Dict]) -> Dict[str, int]:
+    """按发布日期统计新闻数量（无法解析的日期跳过）"""
+    counts = {}
+    for news in news_list:
+        published_at = news.get('published_at', '')
+        try:
+            day = datetime.fromisoformat(published_at).date().isoformat()
+        except (TypeError, ValueError):
+            continue
+        counts[day] = counts.get(day, 0) + 1
+    return counts
+
+
+def build_time_index(news_list: List[Dict]) -> Dict:
+    """
+    按发布时间构建有序索引
+    
+    Returns:
+        {'timestamps': 升序的epoch秒, 'positions': 对应新闻在列表中的位置}
+    """
+    entries = []
+    for position, news in enumerate(news_list):
+        timestamp = parse_timestamp(news.get('published_at', ''))
+        if timestamp is not None:
+            entries.append((timestamp, position))
+    entries.sort()
+    
+    return {
+        'timestamps': [timestamp for timestamp, _ in entries],
+        'positions': [position for _, position in entries]
+    }
+
+
+def time_range_bounds(time_index: Dict, since: Optional[float] = None, until: Optional[float] = None):
+    """二分查找时间范围 [since, until] 在有序索引中的下标区间"""
+    timestamps = time_index['timestamps']
+    lo = bisect_left(timestamps, since) if since is not None else 0
+    hi = bisect_right(timestamps, until) if until is not None else len(timestamps)
+    return lo, max(lo, hi)
+
+
+def positions_between(time_index: Dict, since: Optional[float] = None, until: Optional[float] = None) -> List[int]:
+    """返回发布时间在 [since, until] 内的新闻位置（保持原列表顺序）"""
+    lo, hi = time_range_bounds(time_index, since, until)
+    return sorted(time_index['positions'][lo:hi])
+
+
+def summarize_temperature(analysis: Optional[Dict]) -> Optional[Dict]:
+    """提取投资温度摘要"""
+    if not analysis:
+        return None
+    
+    return {
+        'temperature_score': analysis.get('temperature_score', 50),
+        'sentiment': analysis.get('sentiment', '中性'),
+        'sentiment_emoji': analysis.get('sentiment_emoji', ''),
+        'analyzed_at': analysis.get('analyzed_at')
+    }
+
+
+def build_news_aggregates(news_list: List[Dict], updated_at: Optional[str], analysis: Optional[Dict] = None) -> Dict:
+    """
+    计算新闻聚合统计
+    
+    Args:
+        news_list: 新闻列表
+        updated_at: 对应新闻文件的 updated_at，API据此判断统计是否过期
+        analysis: 投资温度分析结果（可选）
+    
+    Returns:
+        聚合统计字典
+    """
+    return {
+        'source_updated_at': updated_at,
+        'generated_at': datetime.now().isoformat(),
+        'news_total': len(news_list),
+        'categories': _count_by(news_list, 'category', '其他'),
+        'days': _count_by_day(news_list),
+        'sources': _count_by(news_list, 'source', '未知'),
+        'temperature': summarize_temperature(analysis),
+        'time_index': build_time_index(news_list)
+    }
+
+
+def sorted_counts(counts: Dict[str, int], key_name: str, limit: Optional[int] = None) -> List[Dict]:
+    """将统计字典转换为按数量降序排列的列表"""
+    items = sorted(counts.items(), key=lambda x: x[1], reverse=True)
+    if limit is not None:
+        items = items[:limit]
+    return [{key_name: name, 'count': count} for name, count in items]
+
+
+def save_aggregates(filepath: str, news_list: List[Dict], updated_at: str, analysis: Optional[Dict] = None):
+    """计算并保存聚合统计文件"""
+    aggregates = build_news_aggregates(news_list, updated_at, analysis)
+    
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(aggregates, f, ensure_ascii=False, indent=2)
+    
+    return aggregates
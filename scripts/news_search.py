@@ -0,0 +1,162 @@
+"""
+新闻全文检索模块
+爬取脚本保存数据时基于标题和摘要构建倒排索引，API加载后用BM25排序
+"""
+
+from datetime import datetime
+from typing import List, Dict, Optional
+import heapq
+import json
+import math
+import os
+import re
+
+from news_aggregates import parse_timestamp
+
+# 索引格式版本
+INDEX_VERSION = 1
+
+# BM25参数
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# 标题词频权重（标题中的词比摘要更重要）
+TITLE_WEIGHT = 2
+
+# 英文单词或连续的中文字符
+TOKEN_PATTERN = re.compile('[a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff]+')
+
+# 英文停用词
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has',
+    'in', 'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'to', 'was',
+    'were', 'will', 'with'
+}
+
+
+def _is_cjk(char: str) -> bool:
+    """判断是否为中文字符"""
+    return '\u3400' <= char <= '\u9fff'
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：英文按单词切分，中文按相邻两字（bigram）切分
+    
+    单独出现的中文字符保留为单字。
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer((text or '').lower()):
+        run = match.group()
+        if _is_cjk(run[0]):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        elif run not in STOPWORDS:
+            tokens.append(run)
+    return tokens
+
+
+def build_search_index(news_list: List[Dict], updated_at: Optional[str]) -> Dict:
+    """
+    构建倒排索引
+    
+    Args:
+        news_list: 新闻列表
+        updated_at: 对应新闻文件的 updated_at，API据此判断索引是否过期
+    
+    Returns:
+        索引字典，postings 中每个词对应 [文档序号, 词频, 文档序号, 词频, ...]
+    """
+    docs = []
+    postings = {}
+    total_length = 0
+    
+    for position, news in enumerate(news_list):
+        term_freq = {}
+        for token in tokenize(news.get('title', '')):
+            term_freq[token] = term_freq.get(token, 0) + TITLE_WEIGHT
+        for token in tokenize(news.get('description', '')):
+            term_freq[token] = term_freq.get(token, 0) + 1
+        
+        length = sum(term_freq.values())
+        total_length += length
+        
+        doc_id = len(docs)
+        docs.append({
+            'position': position,
+            'category': news.get('category', ''),
+            'source': news.get('source', ''),
+            'timestamp': parse_timestamp(news.get('published_at', '')),
+            'length': length
+        })
+        
+        for token, freq in term_freq.items():
+            postings.setdefault(token, []).extend((doc_id, freq))
+    
+    return {
+        'version': INDEX_VERSION,
+        'source_updated_at': updated_at,
+        'generated_at': datetime.now().isoformat(),
+        'avg_length': total_length / len(docs) if docs else 0,
+        'docs': docs,
+        'postings': postings
+    }
+
+
+def search_index(index: Dict, query: str, category: str = '', source: str = '',
+                 since: Optional[float] = None, until: Optional[float] = None,
+                 limit: int = 20) -> List[Dict]:
+    """
+    在倒排索引中检索，按BM25得分降序返回
+    
+    Returns:
+        [{'position': 新闻在原文件中的位置, 'score': 得分}, ...]
+    """
+    docs = index['docs']
+    postings = index['postings']
+    doc_count = len(docs)
+    avg_length = index['avg_length'] or 1
+    
+    scores = {}
+    for token in set(tokenize(query)):
+        posting = postings.get(token)
+        if not posting:
+            continue
+        
+        doc_freq = len(posting) // 2
+        idf = math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+        
+        for i in range(0, len(posting), 2):
+            doc_id, freq = posting[i], posting[i + 1]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * docs[doc_id]['length'] / avg_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + norm)
+    
+    def matches(doc_id):
+        doc = docs[doc_id]
+        if category and doc['category'] != category:
+            return False
+        if source and doc['source'] != source:
+            return False
+        if since is not None and (doc['timestamp'] is None or doc['timestamp'] < since):
+            return False
+        if until is not None and (doc['timestamp'] is None or doc['timestamp'] > until):
+            return False
+        return True
+    
+    candidates = ((score, doc_id) for doc_id, score in scores.items() if matches(doc_id))
+    top = heapq.nlargest(limit, candidates)
+    
+    return [{'position': docs[doc_id]['position'], 'score': round(score, 4)} for score, doc_id in top]
+
+
+def save_search_index(filepath: str, news_list: List[Dict], updated_at: str):
+    """构建并保存倒排索引文件"""
+    index = build_search_index(news_list, updated_at)
+    
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    
+    return index
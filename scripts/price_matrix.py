@@ -0,0 +1,157 @@
+"""
+全市场价格矩阵
+把多只ETF的K线按交易日对齐为 (ETF数, 天数) 矩阵，整体计算指标、情绪评分和交易信号，
+筛选整个ETF列表只需一次批量运算
+
+缺失的交易日（停牌或尚未上市）不参与指标计算：每只ETF的真实K线先左对齐压紧，
+均线、RSI、EMA/MACD 的递推都从该ETF自己的第一根K线开始并跳过停牌日，结果再放回原日期，
+与单独用这只ETF的K线计算（analyze_etf_strategy.py 的逐只分析）一致。
+mask 标记该ETF当天是否有真实K线；valid 进一步要求真实K线数满足 MIN_HISTORY 和 MACD 预热
+（MACD_MIN_HISTORY），结果只在 valid 的位置有意义
+"""
+
+from typing import Dict, List, Optional
+import numpy as np
+
+from indicators import MACD_MIN_HISTORY, MIN_HISTORY, compute_series, klines_to_arrays
+from strategy_rules import HOLD, features_from_series, sentiment_scores, trading_signals
+
+# valid 要求的最少真实K线数
+VALID_HISTORY = max(MIN_HISTORY, MACD_MIN_HISTORY)
+
+
+def build_price_matrix(klines_by_code: Dict[str, List[Dict]]) -> Dict:
+    """
+    按交易日对齐多只ETF的K线
+
+    Args:
+        klines_by_code: {代码: 按日期升序的K线列表}
+
+    Returns:
+        {'codes', 'dates', 'close', 'volume', 'mask'}，缺失位置 close 为 NaN、volume 为0
+    """
+    codes = list(klines_by_code)
+    arrays = [klines_to_arrays(klines) for klines in klines_by_code.values()]
+    dates = np.unique(np.concatenate([a['date'] for a in arrays])) if arrays else np.array([])
+
+    close = np.full((len(codes), len(dates)), np.nan)
+    volume = np.zeros((len(codes), len(dates)))
+    mask = np.zeros((len(codes), len(dates)), dtype=bool)
+    for row, a in enumerate(arrays):
+        columns = np.searchsorted(dates, a['date'])
+        close[row, columns] = a['close']
+        volume[row, columns] = a['volume']
+        mask[row, columns] = True
+
+    return {'codes': codes, 'dates': dates, 'close': close, 'volume': volume, 'mask': mask}
+
+
+def fill_missing(close: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    填充缺失的收盘价：停牌日用前一交易日的收盘价，上市前用第一个收盘价
+
+    沿最后一维用累计最大值传递最近一个有数据的位置，不需要逐行循环
+    """
+    if not close.shape[-1]:
+        return close.copy()
+    positions = np.arange(close.shape[-1])
+    first = np.argmax(mask, axis=-1)[..., None]
+    last_seen = np.maximum.accumulate(np.where(mask, positions, -1), axis=-1)
+    source = np.where(last_seen >= 0, last_seen, first)
+    return np.take_along_axis(close, source, axis=-1)
+
+
+def compact_rows(values: np.ndarray, mask: np.ndarray, fill: float = np.nan) -> np.ndarray:
+    """
+    把每行 mask 为True的值按原顺序左对齐，返回 (行数, 最多真实K线数) 的数组
+
+    各行第 k 个真实值位于第 k 列，不足的位置为 fill
+    """
+    counts = mask.sum(axis=-1)
+    out = np.full((mask.shape[0], int(counts.max()) if counts.size else 0), fill, dtype=values.dtype)
+    rows, columns = np.nonzero(mask)
+    out[rows, np.cumsum(mask, axis=-1)[rows, columns] - 1] = values[rows, columns]
+    return out
+
+
+def expand_rows(compact: np.ndarray, mask: np.ndarray, fill) -> np.ndarray:
+    """compact_rows 的逆操作：把左对齐的值放回 mask 为True的日期，其余位置为 fill"""
+    out = np.full(mask.shape, fill, dtype=compact.dtype)
+    rows, columns = np.nonzero(mask)
+    out[rows, columns] = compact[rows, np.cumsum(mask, axis=-1)[rows, columns] - 1]
+    return out
+
+
+def compute_matrix(matrix: Dict) -> Dict:
+    """
+    计算全部ETF逐日的指标、情绪评分和交易信号
+
+    所有指标和信号在每只ETF左对齐的真实K线上计算（行尾不足的部分用最后收盘价、成交量0补齐，
+    只影响最后一根真实K线之后的位置，不会用到），再放回原日期；没有真实K线的日期指标为 NaN、
+    信号数为0、建议为 HOLD。series['close'] 是填充后的逐日收盘价（停牌日沿用前一交易日），
+    供回测计算收益。
+
+    Returns:
+        {'series': 指标序列, 'change_percent', 'valid',
+         'sentiment_score', 'buy_signals', 'sell_signals', 'action'}，均为 (ETF数, 天数)
+    """
+    mask = matrix['mask']
+    compact_mask = compact_rows(mask, mask, False)
+    compact_close = fill_missing(compact_rows(matrix['close'], mask), compact_mask)
+    compact_volume = compact_rows(matrix['volume'], mask, 0.0)
+    series = compute_series(compact_close, compact_volume)
+
+    # 涨跌幅相对于该ETF上一根真实K线
+    previous = np.concatenate((compact_close[..., :1], compact_close[..., :-1]), axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_percent = np.where(previous > 0, (compact_close - previous) / previous * 100, 0.0)
+
+    bars = np.arange(compact_close.shape[-1])
+    compact_valid = compact_mask & (bars >= VALID_HISTORY - 1)
+
+    features = features_from_series(series, change_percent)
+    scores = sentiment_scores(features)
+    signals = trading_signals(features, scores)
+
+    series = {key: expand_rows(values, mask, 0 if key == 'cross' else np.nan) for key, values in series.items()}
+    series['close'] = fill_missing(matrix['close'], mask)
+    result = {
+        'series': series,
+        'change_percent': expand_rows(change_percent, mask, np.nan),
+        'valid': expand_rows(compact_valid, mask, False),
+        'sentiment_score': expand_rows(scores.astype(float), mask, np.nan)
+    }
+    result.update({key: expand_rows(values, mask, HOLD if key == 'action' else 0) for key, values in signals.items()})
+    return result
+
+
+def _optional_float(value) -> Optional[float]:
+    """NaN 转为None（JSON 中没有 NaN）"""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def screen_latest(matrix: Dict, result: Dict) -> List[Dict]:
+    """
+    取每只ETF最后一个交易日的评分
+
+    Returns:
+        [{'code', 'date', 'valid', 'close', 'sentiment_score', 'buy_signals', 'sell_signals', 'action'}]；
+        最后一个交易日停牌或历史不足的ETF valid 为False，没有数据的 close / sentiment_score 为None
+    """
+    if not len(matrix['dates']):
+        return []
+
+    rows = []
+    for row, code in enumerate(matrix['codes']):
+        rows.append({
+            'code': code,
+            'date': str(matrix['dates'][-1]),
+            'valid': bool(result['valid'][row, -1]),
+            'close': _optional_float(result['series']['close'][row, -1]),
+            'sentiment_score': _optional_float(result['sentiment_score'][row, -1]),
+            'buy_signals': int(result['buy_signals'][row, -1]),
+            'sell_signals': int(result['sell_signals'][row, -1]),
+            'action': int(result['action'][row, -1])
+        })
+    return rows
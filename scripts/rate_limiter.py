@@ -0,0 +1,47 @@
+"""
+按主机限速模块
+用令牌桶控制对同一主机的请求频率，替代全局的 time.sleep 间隔
+"""
+
+from urllib.parse import urlparse
+from typing import Dict, Optional
+import threading
+import time
+
+
+class HostRateLimiter:
+    """按主机划分的令牌桶限速器（线程安全）"""
+    
+    def __init__(self, rate: float = 1.0, burst: int = 1, overrides: Optional[Dict[str, float]] = None):
+        """
+        初始化限速器
+        
+        Args:
+            rate: 每个主机每秒允许的请求数
+            burst: 每个主机允许的突发请求数
+            overrides: 指定主机的请求速率，如 {'hq.sinajs.cn': 5.0}
+        """
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+    
+    def reserve(self, url: str) -> float:
+        """
+        为一次请求预留令牌
+        
+        Returns:
+            需要等待的秒数（令牌不足时预支，后到的请求依次排队；由调用方异步等待）
+        """
+        host = urlparse(url).netloc.lower()
+        rate = self.overrides.get(host, self.rate)
+        now = time.monotonic()
+        
+        with self._lock:
+            tokens, last = self._buckets.get(host, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * rate)
+            tokens -= 1
+            self._buckets[host] = (tokens, now)
+        
+        return max(0.0, -tokens / rate)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+ETF批量筛选脚本
+从本地K线存储读取整个ETF列表的历史K线，对齐为价格矩阵后一次算出所有ETF的
+技术指标、市场情绪评分和交易信号，按情绪评分排序输出
+
+用法:
+    python scripts/screen_etfs.py
+    python scripts/screen_etfs.py --top 20 --output data/etf_screen.json
+"""
+
+from datetime import datetime
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fetch_etf_data import load_etf_universe
+from kline_store import KlineStore
+from price_matrix import build_price_matrix, compute_matrix, screen_latest
+from strategy_rules import ACTIONS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用本地K线批量计算ETF的情绪评分和交易信号')
+    parser.add_argument('--top', type=int, default=0, help='只输出评分最高的前N只，0 表示全部')
+    parser.add_argument('--output', help='结果写入的JSON文件')
+    args = parser.parse_args()
+
+    etfs = load_etf_universe()
+    names = {etf['code']: etf['name'] for etf in etfs}
+    store = KlineStore()
+    klines_by_code = {etf['code']: store.load(etf['code']) for etf in etfs}
+
+    started = time.perf_counter()
+    matrix = build_price_matrix(klines_by_code)
+    rows = screen_latest(matrix, compute_matrix(matrix))
+    elapsed = time.perf_counter() - started
+
+    rows.sort(key=lambda row: (row['valid'], row['sentiment_score'] if row['sentiment_score'] is not None else -1),
+              reverse=True)
+    for row in rows:
+        row['name'] = names.get(row['code'], '')
+        row['action_code'] = ACTIONS[row['action']][0]
+
+    shown = rows[:args.top] if args.top else rows
+    print(f"共 {len(rows)} 只ETF，{matrix['close'].shape[1]} 个交易日，计算耗时 {elapsed * 1000:.1f} ms")
+    for row in shown:
+        if not row['valid']:
+            print(f"  {row['name']}({row['code']}): 最新交易日无数据或历史不足")
+            continue
+        print(f"  {row['name']}({row['code']}): 收盘 {row['close']:.3f}  情绪 {row['sentiment_score']:.0f}  "
+              f"买入信号 {row['buy_signals']}  卖出信号 {row['sell_signals']}  {ACTIONS[row['action']][1]}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': datetime.now().isoformat(), 'etfs': rows}, f, ensure_ascii=False, indent=2,
+                      allow_nan=False)
+
+
+if __name__ == '__main__':
+    main()
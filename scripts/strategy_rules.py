@@ -0,0 +1,230 @@
+"""
+策略评分规则（数组版）
+analyze_etf_strategy.py 中市场情绪评分和交易信号的规则，以逐元素的数组运算实现：
+同一套规则既可以对一批ETF的最新指标（一维）计算，也可以对 (ETF数, 天数) 的指标矩阵逐日计算
+"""
+
+from typing import Dict, List
+import numpy as np
+
+# 情绪等级：(最低分, 名称, 图标)，从高到低匹配
+SENTIMENT_LEVELS = [
+    (70, '强烈看多', '🚀'),
+    (60, '看多', '📈'),
+    (50, '偏多', '😊'),
+    (40, '中性', '😐'),
+    (30, '偏空', '😟'),
+    (0, '看空', '📉')
+]
+
+# 交易建议：编号 -> (代码, 名称, 置信度)
+ACTIONS = [
+    ('strong_buy', '强烈建议买入', 90),
+    ('buy', '建议买入', 75),
+    ('hold', '建议持有', 60),
+    ('reduce', '建议减仓', 70),
+    ('sell', '建议卖出', 85)
+]
+STRONG_BUY, BUY, HOLD, REDUCE, SELL = range(len(ACTIONS))
+
+# MACD交叉发生在最近几根K线内才视为金叉/死叉信号
+MACD_CROSS_RECENT_BARS = 3
+
+# 没有交叉时 cross_bars_ago 的取值
+NO_CROSS = np.iinfo(np.int32).max
+
+# 特征缺失时的默认值（与原先从指标字典 .get() 取值的默认值一致）
+FEATURE_DEFAULTS = {
+    'change_percent': 0.0,
+    'current': 0.0,
+    'rsi': 50.0,
+    'dif': 0.0,
+    'dea': 0.0,
+    'macd': 0.0,
+    'ma5': 0.0,
+    'ma10': 0.0,
+    'ma20': 0.0,
+    'boll_upper': 0.0,
+    'boll_lower': 0.0,
+    'volume_change': 0.0
+}
+
+
+def features_from_etf_data(etf_data_list: List[Dict]) -> Dict[str, np.ndarray]:
+    """把 etf_data.json 中每只ETF的实时数据和指标字典转为一维特征数组"""
+    columns = {key: [] for key in FEATURE_DEFAULTS}
+    cross_direction = []
+    cross_bars_ago = []
+
+    for etf_data in etf_data_list:
+        realtime = etf_data.get('realtime', {})
+        indicators = etf_data.get('indicators', {})
+        macd = indicators.get('macd', {})
+        bollinger = indicators.get('bollinger', {})
+        values = {
+            'change_percent': realtime.get('change_percent'),
+            'current': realtime.get('current'),
+            'rsi': indicators.get('rsi'),
+            'dif': macd.get('dif'),
+            'dea': macd.get('dea'),
+            'macd': macd.get('macd'),
+            'ma5': indicators.get('ma5'),
+            'ma10': indicators.get('ma10'),
+            'ma20': indicators.get('ma20'),
+            'boll_upper': bollinger.get('upper'),
+            'boll_lower': bollinger.get('lower'),
+            'volume_change': indicators.get('volume_change')
+        }
+        for key, value in values.items():
+            columns[key].append(FEATURE_DEFAULTS[key] if value is None else value)
+
+        last_cross = macd.get('last_cross')
+        if last_cross:
+            cross_direction.append(1 if last_cross['direction'] == 'golden' else -1)
+            cross_bars_ago.append(last_cross['bars_ago'])
+        else:
+            cross_direction.append(0)
+            cross_bars_ago.append(NO_CROSS)
+
+    features = {key: np.array(values, dtype=float) for key, values in columns.items()}
+    features['cross_direction'] = np.array(cross_direction, dtype=np.int8)
+    features['cross_bars_ago'] = np.array(cross_bars_ago, dtype=np.int64)
+    return features
+
+
+def last_cross_features(cross: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    由逐日交叉序列（indicators.macd 的 cross）得到每一天的最近一次交叉方向和距今根数
+
+    沿最后一维用累计最大值传递最近一次交叉的位置，一次线性扫描
+    """
+    positions = np.arange(cross.shape[-1])
+    last_index = np.maximum.accumulate(np.where(cross != 0, positions, -1), axis=-1)
+    has_cross = last_index >= 0
+    direction = np.take_along_axis(cross, np.maximum(last_index, 0), axis=-1)
+    return {
+        'cross_direction': np.where(has_cross, direction, 0).astype(np.int8),
+        'cross_bars_ago': np.where(has_cross, positions - last_index, NO_CROSS)
+    }
+
+
+def features_from_series(series: Dict[str, np.ndarray], change_percent: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    把 indicators.compute_series 的指标序列转为逐日特征（收盘价作为当日价格）
+
+    NaN（数据不足）按 FEATURE_DEFAULTS 填充，与最新指标字典中的默认值一致
+    """
+    raw = {
+        'change_percent': change_percent,
+        'current': series['close'],
+        'rsi': series['rsi'],
+        'dif': series['dif'],
+        'dea': series['dea'],
+        'macd': series['macd'],
+        'ma5': series['ma5'],
+        'ma10': series['ma10'],
+        'ma20': series['ma20'],
+        'boll_upper': series['boll_upper'],
+        'boll_lower': series['boll_lower'],
+        'volume_change': series['volume_change']
+    }
+    features = {key: np.where(np.isnan(values), FEATURE_DEFAULTS[key], values) for key, values in raw.items()}
+    features.update(last_cross_features(series['cross']))
+    return features
+
+
+def sentiment_scores(features: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    市场情绪评分（0-100）
+
+    价格趋势、RSI、MACD、均线系统四项加到中性基准50上
+    """
+    change_percent = features['change_percent']
+    rsi = features['rsi']
+    dif, dea, macd = features['dif'], features['dea'], features['macd']
+    current, ma5, ma10, ma20 = features['current'], features['ma5'], features['ma10'], features['ma20']
+
+    # 价格趋势 (30%)
+    score = 50 + np.select([change_percent > 2, change_percent > 0, change_percent > -2], [15, 8, -8], -15)
+
+    # RSI指标 (25%)：超买、偏强、中性、偏弱、超卖
+    score += np.select([rsi > 70, rsi > 60, rsi > 40, rsi > 30], [-10, 5, 10, 5], -10)
+
+    # MACD指标 (25%)
+    score += np.select([(macd > 0) & (dif > dea), macd > 0, dif > dea], [12, 6, 3], -8)
+
+    # 均线系统 (20%)：多头排列、空头排列
+    above_ma5, ma5_above_ma10, ma10_above_ma20 = current > ma5, ma5 > ma10, ma10 > ma20
+    below_ma5, ma5_below_ma10, ma10_below_ma20 = current < ma5, ma5 < ma10, ma10 < ma20
+    score += np.select(
+        [above_ma5 & ma5_above_ma10 & ma10_above_ma20, above_ma5 & ma5_above_ma10,
+         below_ma5 & ma5_below_ma10 & ma10_below_ma20, below_ma5 & ma5_below_ma10],
+        [10, 5, -10, -5], 0
+    )
+
+    return np.clip(score, 0, 100)
+
+
+def sentiment_level(score: float) -> Dict:
+    """情绪评分对应的 {'score', 'sentiment', 'emoji'}"""
+    for threshold, sentiment, emoji in SENTIMENT_LEVELS:
+        if score >= threshold:
+            return {'score': round(float(score), 1), 'sentiment': sentiment, 'emoji': emoji}
+    return {'score': round(float(score), 1), 'sentiment': SENTIMENT_LEVELS[-1][1], 'emoji': SENTIMENT_LEVELS[-1][2]}
+
+
+def trading_signals(features: Dict[str, np.ndarray], scores: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    交易信号
+
+    Returns:
+        {'buy_signals', 'sell_signals', 'action'}，action 为 ACTIONS 的编号
+    """
+    rsi = features['rsi']
+    dif, dea = features['dif'], features['dea']
+    current = features['current']
+    change_percent = features['change_percent']
+    volume_change = features['volume_change']
+
+    buy = np.zeros(np.shape(scores), dtype=np.int64)
+    sell = np.zeros(np.shape(scores), dtype=np.int64)
+
+    # 1. 情绪评分
+    buy += np.select([scores >= 65, scores >= 55], [2, 1], 0)
+    sell += np.select([scores >= 55, scores <= 35, scores <= 45], [0, 2, 1], 0)
+
+    # 2. RSI：超卖加买入信号，超买加卖出信号
+    buy += np.select([rsi < 30, rsi < 40], [2, 1], 0)
+    sell += np.select([rsi < 40, rsi > 70, rsi > 60], [0, 2, 1], 0)
+
+    # 3. MACD金叉死叉（最近发生的交叉），没有近期交叉时看DIF与DEA的相对位置
+    recent = (features['cross_direction'] != 0) & (features['cross_bars_ago'] <= MACD_CROSS_RECENT_BARS)
+    golden = recent & (features['cross_direction'] > 0)
+    death = recent & (features['cross_direction'] < 0)
+    buy += np.select([golden, death, dif > dea], [2, 0, 1], 0)
+    sell += np.select([death, golden, dif < dea], [2, 0, 1], 0)
+
+    # 4. 价格与布林带：触及下轨、触及上轨
+    below_lower = current < features['boll_lower']
+    buy += below_lower
+    sell += ~below_lower & (current > features['boll_upper'])
+
+    # 5. 成交量：放量上涨、放量下跌
+    heavy_volume = volume_change > 50
+    buy += heavy_volume & (change_percent > 0)
+    sell += heavy_volume & (change_percent < 0)
+
+    action = np.select([buy >= 5, buy >= 3, sell >= 5, sell >= 3], [STRONG_BUY, BUY, SELL, REDUCE], HOLD)
+    return {'buy_signals': buy, 'sell_signals': sell, 'action': action}
+
+
+def signal_dict(buy_signals: int, sell_signals: int, action: int) -> Dict:
+    """单只ETF的交易信号字典（与 generate_trading_signal 的输出一致）"""
+    action_code, action_name, confidence = ACTIONS[int(action)]
+    return {
+        'action': action_name,
+        'action_code': action_code,
+        'confidence': confidence,
+        'buy_signals': int(buy_signals),
+        'sell_signals': int(sell_signals)
+    }
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+增量指标状态测试脚本
+用随机价格序列检查 indicator_state 的逐根递推结果与 indicators 的批量计算一致：
+RSI、MACD（DIF/DEA/柱状值/最近交叉）、均线和布林带，以及盘中 quote() 和序列化恢复
+"""
+
+import os
+import random
+import sys
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+from indicator_state import EtfIndicatorState
+from indicators import calculate_technical_indicators
+
+SERIES_COUNT = 300
+SERIES_LENGTH = 120
+
+# 四舍五入后最后一位的允许误差（两种算法的浮点误差恰好落在进位边界时）
+TOLERANCE = {'ma5': 1e-3, 'ma10': 1e-3, 'ma20': 1e-3, 'rsi': 1e-2}
+MACD_TOLERANCE = 1e-4
+BOLLINGER_TOLERANCE = 1e-3
+EPSILON = 1e-9
+
+
+def random_klines(rng, length):
+    close = rng.uniform(0.5, 3.0)
+    klines = []
+    for day in range(length):
+        close = max(0.01, round(close * (1 + rng.gauss(0, 0.02)), 3))
+        klines.append({
+            'date': f'2020-{day // 28 + 1:02d}-{day % 28 + 1:02d}',
+            'open': close, 'high': close, 'low': close, 'close': close,
+            'volume': rng.uniform(1e5, 1e6), 'amount': 0.0
+        })
+    return klines
+
+
+def compare(batch, stream):
+    """返回不一致的字段列表"""
+    mismatches = []
+    for key, tolerance in TOLERANCE.items():
+        if abs(batch[key] - stream[key]) > tolerance + EPSILON:
+            mismatches.append(key)
+    for key in ('dif', 'dea', 'macd'):
+        if abs(batch['macd'][key] - stream['macd'][key]) > MACD_TOLERANCE + EPSILON:
+            mismatches.append(f'macd.{key}')
+    if batch['macd']['last_cross'] != stream['macd']['last_cross']:
+        mismatches.append('macd.last_cross')
+    for key in ('upper', 'middle', 'lower'):
+        if abs(batch['bollinger'][key] - stream['bollinger'][key]) > BOLLINGER_TOLERANCE + EPSILON:
+            mismatches.append(f'bollinger.{key}')
+    return mismatches
+
+
+def test_stream_matches_batch():
+    """逐根提交K线后的指标、quote() 的指标都与批量计算的最后一天一致"""
+    rng = random.Random(20240101)
+    failures = 0
+    for _ in range(SERIES_COUNT):
+        klines = random_klines(rng, SERIES_LENGTH)
+        state = EtfIndicatorState.from_klines(klines[:-1])
+
+        # 序列化后恢复，确认状态完整
+        state = EtfIndicatorState.from_dict(state.to_dict())
+
+        quoted = state.quote(klines[-1]['close'])
+        state.update(klines[-1]['date'], klines[-1]['close'])
+        batch = calculate_technical_indicators(klines)
+
+        for label, stream in (('quote', quoted), ('update', state.current())):
+            mismatches = compare(batch, stream)
+            if mismatches:
+                failures += 1
+                print(f"  ✗ {label}: {', '.join(mismatches)}")
+    assert not failures, f"{failures} 处不一致"
+
+
+def main():
+    print("=" * 60)
+    print("增量指标状态与批量计算一致性测试")
+    print("=" * 60)
+
+    try:
+        test_stream_matches_batch()
+    except AssertionError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    print(f"\n✅ {SERIES_COUNT} 条随机序列全部一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+价格矩阵测试脚本
+检查晚上市、中途停牌的ETF在价格矩阵中的指标、评分和交易信号，
+与只用这只ETF自己的K线单独计算（compute_series）的结果一致
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(__file__))
+
+from indicators import MACD_MIN_HISTORY, compute_series, klines_to_arrays
+from price_matrix import build_price_matrix, compute_matrix
+from strategy_rules import features_from_series, sentiment_scores, trading_signals
+
+MATRIX_DAYS = 200
+TOLERANCE = 1e-9
+
+
+def random_klines(rng, dates):
+    close = rng.uniform(0.5, 3.0)
+    klines = []
+    for date in dates:
+        close = max(0.01, round(close * (1 + rng.gauss(0, 0.02)), 3))
+        klines.append({
+            'date': date, 'open': close, 'high': close, 'low': close, 'close': close,
+            'volume': rng.uniform(1e5, 1e6), 'amount': 0.0
+        })
+    return klines
+
+
+def standalone(klines):
+    """单独用一只ETF的K线计算指标、评分和信号"""
+    arrays = klines_to_arrays(klines)
+    series = compute_series(arrays['close'], arrays['volume'])
+    close = arrays['close']
+    previous = np.concatenate((close[:1], close[:-1]))
+    change_percent = (close - previous) / previous * 100
+    features = features_from_series(series, change_percent)
+    scores = sentiment_scores(features)
+    return series, scores, trading_signals(features, scores)
+
+
+def test_late_listed_matches_standalone():
+    """上市晚于矩阵起点、中间有停牌日的ETF，每根真实K线上的结果与单独计算一致"""
+    rng = random.Random(20240601)
+    dates = [f'D{day:04d}' for day in range(MATRIX_DAYS)]
+    full = random_klines(rng, dates)
+    # 第60天上市，之后随机停牌约10%的交易日
+    late = [kline for kline in random_klines(rng, dates[60:]) if rng.random() > 0.1]
+
+    matrix = build_price_matrix({'full': full, 'late': late})
+    result = compute_matrix(matrix)
+    row = matrix['codes'].index('late')
+    columns = np.flatnonzero(matrix['mask'][row])
+
+    series, scores, signals = standalone(late)
+    failures = []
+    for key, values in series.items():
+        actual = result['series'][key][row, columns]
+        if key == 'close':
+            same = np.array_equal(actual, values)
+        else:
+            same = np.allclose(actual, values, rtol=0, atol=TOLERANCE, equal_nan=True)
+        if not same:
+            failures.append(key)
+    if not np.allclose(result['sentiment_score'][row, columns], scores, rtol=0, atol=TOLERANCE):
+        failures.append('sentiment_score')
+    for key, values in signals.items():
+        if not np.array_equal(result[key][row, columns], values):
+            failures.append(key)
+
+    # valid 从第 MACD_MIN_HISTORY 根真实K线开始
+    expected_valid = np.arange(len(late)) >= MACD_MIN_HISTORY - 1
+    if not np.array_equal(result['valid'][row, columns], expected_valid):
+        failures.append('valid')
+    if result['valid'][row][~matrix['mask'][row]].any():
+        failures.append('valid(停牌日)')
+
+    for key in failures:
+        print(f"  ✗ {key}")
+    assert not failures, f"{len(failures)} 项不一致"
+
+
+def main():
+    print("=" * 60)
+    print("价格矩阵与单只ETF计算一致性测试")
+    print("=" * 60)
+
+    try:
+        test_late_listed_matches_standalone()
+    except AssertionError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    print("\n✅ 晚上市、有停牌日的ETF与单独计算一致")
+
+
+if __name__ == '__main__':
+    main()